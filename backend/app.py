@@ -1,24 +1,239 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
-import yt_dlp
+from werkzeug.http import parse_options_header
+import copy
+import json
 import os
+import shutil
 import tempfile
 import uuid
-import threading
 import time
 from pathlib import Path
+from urllib.parse import parse_qs, urlparse
 import logging
 import random
+import socket
+import threading
+
+from audio_formats import (
+    mimetype_for,
+    negotiate_output,
+    negotiate_renditions,
+    processing_path,
+    rendition_key,
+    slim_resolved_info,
+    source_selector,
+)
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from cluster import (
+    FORWARDED_HEADER,
+    FORWARDED_REQUEST_HEADERS,
+    RELAYED_RESPONSE_HEADERS,
+    PeerUnavailable,
+    create_cluster,
+)
+from config import Config, sanitize_filename
+from janitor import Janitor
+from job_cost import JobTooLargeError, check_limits, estimate_cost
+from job_store import create_job_store
+from metadata_cache import create_metadata_cache
+from metrics import MetricsRegistry
+from offload import blocking
+from ranged_fetch import RangeNotSupported, fetch_ranged
+from rate_governor import RateGovernor
+from renditions import encode_renditions
+from scheduler import DownloadScheduler, QueueFullError
+from shared_state import create_shared_state
+from streaming import STREAM_FORMATS, pick_audio_format, stream_audio
+from transcode_cache import TranscodeCache
+from worker_slots import WorkerSlots
+from youtube_url import extract_video_id, parse_youtube_url, playlist_url, video_url
+from zip_stream import stream_zip
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app)
-
-# Global dictionary to store download progress
-download_progress = {}
+CORS(app, expose_headers=["Content-Disposition", "Content-Length", "ETag", "Accept-Ranges"])
+
+# Let the front-end server send file bodies (see Config.FILE_OFFLOAD)
+app.use_x_sendfile = Config.FILE_OFFLOAD == "sendfile"
+
+# Job state shared by every server process (see Config.JOB_STORE)
+job_store = create_job_store(Config.JOB_STORE, Config.JOB_STORE_PATH)
+
+# Small records shared by every worker process (see Config.JOB_STORE)
+shared_state = create_shared_state(Config.JOB_STORE, Config.JOB_STORE_PATH)
+
+# Two-stage pipeline, each stage a fixed-size worker pool with a bounded
+# queue: network-bound fetches, then CPU-bound ffmpeg work. Fetch workers
+# block handing off to a full transcode queue (backpressure). Jobs cost
+# their estimated media duration, so with JOB_SCHEDULING=sjf short videos
+# are not stuck behind long ones. Both limits are host-wide: every worker
+# process runs these pools, but a job first takes one of the slots shared
+# by all of them.
+scheduler_aging = Config.SCHEDULER_AGING if Config.JOB_SCHEDULING == "sjf" else None
+download_scheduler = DownloadScheduler(
+    Config.MAX_CONCURRENT_DOWNLOADS,
+    Config.MAX_QUEUED_DOWNLOADS,
+    name="fetch-worker",
+    aging=scheduler_aging,
+    default_cost=Config.SCHEDULER_DEFAULT_COST,
+    slots=WorkerSlots(shared_state, "fetch_slots", Config.MAX_CONCURRENT_DOWNLOADS),
+)
+transcode_scheduler = DownloadScheduler(
+    Config.TRANSCODE_WORKERS,
+    Config.TRANSCODE_QUEUE_SIZE,
+    name="transcode-worker",
+    aging=scheduler_aging,
+    default_cost=Config.SCHEDULER_DEFAULT_COST,
+    slots=WorkerSlots(shared_state, "transcode_slots", Config.TRANSCODE_WORKERS),
+)
+
+# ffmpeg processes behind /api/stream responses, host-wide
+stream_slots = WorkerSlots(shared_state, "stream_slots", Config.MAX_CONCURRENT_STREAMS)
+
+# Batch coordinators: each expands a playlist/URL list and feeds its items
+# to the fetch pool a few at a time
+batch_scheduler = DownloadScheduler(
+    Config.BATCH_WORKERS, Config.MAX_QUEUED_DOWNLOADS, name="batch-worker"
+)
+
+# Finished audio shared across jobs, keyed by video ID and output format
+transcode_cache = TranscodeCache(
+    Config.CACHE_DIR, Config.CACHE_MAX_BYTES, shared_state
+)
+
+# Single background thread that expires jobs and reclaims disk
+janitor = Janitor(
+    job_store,
+    transcode_cache,
+    Config.WORK_DIR,
+    retention=Config.CLEANUP_INTERVAL,
+    min_free_bytes=Config.MIN_FREE_DISK_BYTES,
+    sweep_interval=Config.JANITOR_SWEEP_INTERVAL,
+)
+
+# Video metadata by video ID; failures that will not fix themselves are
+# cached too, for a shorter time. Both metadata caches are shared by every
+# worker process (see Config.JOB_STORE)
+video_info_cache = create_metadata_cache(
+    Config.JOB_STORE,
+    Config.JOB_STORE_PATH,
+    "video_info",
+    Config.VIDEO_INFO_CACHE_SIZE,
+    Config.VIDEO_INFO_TTL,
+)
+
+# Extraction results (with resolved stream URLs) from /api/video-info,
+# trimmed to the selectable formats and kept briefly so the download that
+# usually follows, on whichever worker, can skip re-extraction
+resolved_info_cache = create_metadata_cache(
+    Config.JOB_STORE,
+    Config.JOB_STORE_PATH,
+    "resolved_info",
+    Config.RESOLVED_INFO_CACHE_SIZE,
+    Config.RESOLVED_INFO_TTL,
+)
+
+# Upstream health, shared with the other workers: the pace of requests to
+# YouTube, and a breaker that stops work while YouTube is blocking us
+rate_governor = RateGovernor(
+    shared_state,
+    max_rate=Config.UPSTREAM_MAX_RATE,
+    min_rate=Config.UPSTREAM_MIN_RATE,
+    burst=Config.UPSTREAM_BURST,
+    recovery=Config.UPSTREAM_RATE_RECOVERY,
+    backoff_factor=Config.UPSTREAM_BACKOFF_FACTOR,
+    cooldown=Config.UPSTREAM_BACKOFF_COOLDOWN,
+)
+circuit_breaker = CircuitBreaker(
+    shared_state, Config.CIRCUIT_FAILURE_THRESHOLD, Config.CIRCUIT_RESET_TIMEOUT
+)
+
+# Long-lived SSE streams are only served by gevent workers, which hold
+# them as cheap greenlets; sync workers would be pinned for the stream
+PROGRESS_EVENTS = Config.SERVER_MODE == "async"
+# Likewise /api/stream, which holds its request for the whole transfer
+# and would be cut off at the Gunicorn timeout under sync workers
+AUDIO_STREAMS = Config.SERVER_MODE == "async"
+
+# Cluster mode (None when standalone): requests for a video are served by
+# the node that owns its ID, so each video is fetched and cached once
+cluster = create_cluster(
+    Config.CLUSTER_SELF,
+    Config.CLUSTER_PEERS,
+    Config.CLUSTER_VNODES,
+    Config.CLUSTER_TIMEOUT,
+    Config.CLUSTER_PEER_COOLDOWN,
+)
+
+# Extraction errors worth negative caching (as opposed to throttling/network)
+PERMANENT_ERROR_MARKERS = (
+    "Private video",
+    "Video unavailable",
+    "This video has been removed",
+    "Sign in to confirm your age",
+    "age-restricted",
+)
+
+# Prometheus metrics for /api/metrics, summed over all worker processes
+metrics = MetricsRegistry(shared_state, Config.METRICS_FLUSH_INTERVAL)
+stage_seconds = metrics.histogram(
+    "ytdl_stage_duration_seconds",
+    "Time spent in each request/job stage",
+    ("stage",),
+)
+source_bytes = metrics.counter(
+    "ytdl_source_bytes_total", "Source audio bytes downloaded from upstream"
+)
+served_bytes = metrics.counter(
+    "ytdl_served_bytes_total", "Audio bytes sent to clients"
+)
+cache_lookups = metrics.counter(
+    "ytdl_cache_lookups_total", "Cache lookups by cache and result", ("cache", "result")
+)
+job_errors = metrics.counter(
+    "ytdl_job_errors_total", "Failed jobs by error class", ("error_class",)
+)
+metrics.gauge(
+    "ytdl_queue_depth",
+    "Jobs waiting for a worker",
+    lambda: {
+        ("fetch",): download_scheduler.stats()["queued"],
+        ("transcode",): transcode_scheduler.stats()["queued"],
+    },
+    ("pool",),
+    per_process=True,
+)
+metrics.gauge(
+    "ytdl_active_workers",
+    "Workers currently running a job",
+    lambda: {
+        ("fetch",): download_scheduler.stats()["active"],
+        ("transcode",): transcode_scheduler.stats()["active"],
+    },
+    ("pool",),
+    per_process=True,
+)
+metrics.gauge(
+    "ytdl_upstream_rate",
+    "Current upstream request rate allowed by the governor (requests/s)",
+    lambda: rate_governor.stats()["rate"],
+)
+metrics.gauge(
+    "ytdl_upstream_throttle_events",
+    "Upstream 403/429 responses seen by all workers",
+    lambda: rate_governor.stats()["throttle_events"],
+)
+metrics.gauge(
+    "ytdl_circuit_open",
+    "1 while the upstream circuit breaker refuses new work",
+    lambda: 1 if circuit_breaker.retry_after() else 0,
+)
+metrics.gauge("ytdl_tracked_jobs", "Jobs in the job store", lambda: len(job_store))
+metrics.gauge("ytdl_cache_bytes", "Bytes held by the transcode cache", transcode_cache.usage)
 
 # User agents pool to rotate
 USER_AGENTS = [
@@ -35,9 +250,73 @@ def get_random_user_agent():
     return random.choice(USER_AGENTS)
 
 
+_governed_ydl_class = None
+
+
+def governed_ydl(params):
+    """YoutubeDL whose upstream HTTP requests are paced by rate_governor.
+
+    Extractor page/API requests and media downloads both go through
+    urlopen, so every request waits for a token and every 403/429
+    feeds back into the shared rate. While the circuit breaker is open
+    requests fail immediately, which also cuts short yt-dlp's retries.
+
+    yt-dlp is imported on first use (see warm_yt_dlp for preload mode).
+    """
+    global _governed_ydl_class
+    if _governed_ydl_class is None:
+        import yt_dlp
+        from yt_dlp.networking.exceptions import HTTPError
+
+        class GovernedYoutubeDL(yt_dlp.YoutubeDL):
+            def urlopen(self, req):
+                retry_after = circuit_breaker.retry_after()
+                if retry_after:
+                    raise CircuitOpenError(retry_after)
+                waited = rate_governor.acquire()
+                if waited:
+                    stage_seconds.observe(waited, stage="rate_wait")
+                try:
+                    response = super().urlopen(req)
+                except HTTPError as e:
+                    if e.status in (403, 429):
+                        rate_governor.record_throttle()
+                    raise
+                # A half-open probe closes the circuit on its first answer
+                circuit_breaker.record_probe_success()
+                return response
+
+        _governed_ydl_class = GovernedYoutubeDL
+    return _governed_ydl_class(params)
+
+
+def warm_yt_dlp():
+    """Import yt-dlp with its extractors and postprocessors now.
+
+    With PRELOAD_APP the Gunicorn master calls this before forking, so
+    every worker shares these pages copy-on-write instead of paying for
+    the import on its first job.
+    """
+    from yt_dlp.postprocessor import FFmpegExtractAudioPP  # noqa: F401
+
+    # Building a YoutubeDL instantiates every extractor class
+    with governed_ydl({"quiet": True, "no_warnings": True}):
+        pass
+
+
 class ProgressHook:
+    """yt-dlp progress callback that publishes only meaningful changes.
+
+    yt-dlp can call this hundreds of times a second; a store write happens
+    only when the status changes, progress moves by PROGRESS_MIN_STEP
+    points, or PROGRESS_MIN_INTERVAL seconds have passed.
+    """
+
     def __init__(self, download_id):
         self.download_id = download_id
+        self.last_status = None
+        self.last_percent = -1.0
+        self.last_publish = 0.0
 
     def __call__(self, d):
         if d["status"] == "downloading":
@@ -51,23 +330,67 @@ class ProgressHook:
                     percent = 0
             else:
                 percent = 0
-
-            download_progress[self.download_id] = {
-                "status": "downloading",
-                "progress": min(percent, 99),  # Cap at 99% until complete
-                "speed": d.get("_speed_str", ""),
-                "eta": d.get("_eta_str", ""),
-            }
+            percent = min(percent, 99)  # Cap at 99% until complete
+
+            now = time.monotonic()
+            if (
+                self.last_status == "downloading"
+                and percent - self.last_percent < Config.PROGRESS_MIN_STEP
+                and now - self.last_publish < Config.PROGRESS_MIN_INTERVAL
+            ):
+                return
+            # Only the first tick changes the status; later ticks are
+            # progress-only updates
+            fields = {}
+            if self.last_status != "downloading":
+                fields["status"] = "downloading"
+            self.last_status = "downloading"
+            self.last_percent = percent
+            self.last_publish = now
+
+            job_store.update(
+                self.download_id,
+                **fields,
+                progress=percent,
+                speed=d.get("_speed_str", ""),
+                eta=d.get("_eta_str", ""),
+                partial_file=d.get("tmpfilename"),
+            )
         elif d["status"] == "finished":
-            download_progress[self.download_id] = {
-                "status": "finished",
-                "progress": 100,
-                "filename": d["filename"],
-            }
+            self.last_status = "finished"
+            job_store.update(
+                self.download_id,
+                status="finished",
+                progress=100,
+                filename=d["filename"],
+            )
+
+
+def get_video_info(video_id):
+    """Extract video information without downloading, via the metadata cache"""
+    cached = video_info_cache.get(video_id)
+    cache_lookups.inc(cache="video_info", result="hit" if cached else "miss")
+    if cached is not None:
+        return dict(cached)
+
+    with stage_seconds.time(stage="extract"):
+        result = extract_video_info(video_id)
+
+    if result["success"]:
+        video_info_cache.put(video_id, result)
+    elif permanent_failure(result):
+        video_info_cache.put(video_id, result, ttl=Config.VIDEO_INFO_NEGATIVE_TTL)
+    return dict(result)
+
 
+def permanent_failure(result):
+    """Whether a failed video info lookup will fail again (private, removed...)"""
+    return any(marker in result["error"] for marker in PERMANENT_ERROR_MARKERS)
 
-def get_video_info(url):
-    """Extract video information without downloading"""
+
+@blocking  # yt-dlp extraction is CPU-heavy; keep it off the event loop
+def extract_video_info(video_id):
+    """Extract video information from YouTube without downloading"""
     ydl_opts = {
         "quiet": True,
         "no_warnings": True,
@@ -82,11 +405,12 @@ def get_video_info(url):
             "Sec-Fetch-Site": "none",
             "Upgrade-Insecure-Requests": "1",
         },
-        "extractor_retries": 3,
+        # Blocks are handled by the circuit breaker, so keep retries short
+        "extractor_retries": 1,
         "fragment_retries": 3,
         "retry_sleep_functions": {
-            "http": lambda n: min(2**n, 30),
-            "fragment": lambda n: min(2**n, 30),
+            "http": lambda n: min(2**n, 10),
+            "fragment": lambda n: min(2**n, 10),
         },
         # Additional options for better compatibility
         "extract_flat": False,
@@ -95,8 +419,13 @@ def get_video_info(url):
     }
 
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
+        circuit_breaker.allow()
+        with governed_ydl(ydl_opts) as ydl:
+            info = ydl.extract_info(video_url(video_id), download=False)
+            record_upstream_outcome()
+            resolved_info_cache.put(
+                video_id, slim_resolved_info(ydl.sanitize_info(info))
+            )
             return {
                 "success": True,
                 "title": info.get("title", "Unknown"),
@@ -106,29 +435,237 @@ def get_video_info(url):
                 "view_count": info.get("view_count", 0),
                 "upload_date": info.get("upload_date", ""),
             }
+    except CircuitOpenError as e:
+        return {
+            "success": False,
+            "error": ERROR_MESSAGES["blocked"],
+            "error_class": "blocked",
+            "retry_after": e.retry_after,
+        }
     except Exception as e:
         logger.error(f"Error extracting video info: {str(e)}")
-        return {"success": False, "error": str(e)}
+        record_upstream_outcome(e)
+        return {"success": False, "error": str(e), "error_class": classify_exception(e)}
+
+
+def resolved_urls_expired(info, margin=60):
+    """True if the signed stream URLs in an info dict expire within margin seconds"""
+    for fmt in info.get("formats") or []:
+        expire = parse_qs(urlparse(fmt.get("url", "")).query).get("expire")
+        if expire:
+            try:
+                return int(expire[0]) - margin < time.time()
+            except ValueError:
+                return True
+    return False
+
+
+# Error class -> message shown to end users
+ERROR_MESSAGES = {
+    "blocked": "⚠️ YouTube has temporarily blocked this request. This is likely due to rate limiting. Please wait a few minutes and try again, or try a different video.",
+    "not_found": "❌ Video not found. The video might be private, deleted, or the URL is incorrect.",
+    "unavailable": "🚫 Video is unavailable in your region or has been removed.",
+    "age_restricted": "🔞 This video is age-restricted and cannot be downloaded without authentication.",
+    "private": "🔒 This is a private video and cannot be downloaded.",
+    "network": "🌐 Network error occurred. Please check your internet connection and try again.",
+}
+
+
+def classify_error(error_msg):
+    """Map a yt-dlp/ffmpeg error message to a coarse error class"""
+    if (
+        "403" in error_msg
+        or "Forbidden" in error_msg
+        or "429" in error_msg
+        or "not a bot" in error_msg
+    ):
+        return "blocked"
+    elif "404" in error_msg:
+        return "not_found"
+    elif "unavailable" in error_msg.lower():
+        return "unavailable"
+    elif "Sign in to confirm your age" in error_msg:
+        return "age_restricted"
+    elif "Private video" in error_msg:
+        return "private"
+    elif "network" in error_msg.lower() or "timeout" in error_msg.lower():
+        return "network"
+    return "other"
+
+
+def exception_chain(error):
+    """The error and every exception it wraps, outermost first.
+
+    yt-dlp wraps the real cause: DownloadError keeps it in exc_info and
+    ExtractorError in cause.
+    """
+    seen = []
+    while error is not None and not any(error is e for e in seen):
+        seen.append(error)
+        exc_info = getattr(error, "exc_info", None)
+        if isinstance(exc_info, tuple) and len(exc_info) > 1 and exc_info[1]:
+            error = exc_info[1]
+        elif isinstance(getattr(error, "cause", None), BaseException):
+            error = error.cause
+        else:
+            error = error.__cause__ or error.__context__
+    return seen
+
+
+def classify_exception(error):
+    """Error class for an exception, from its type and HTTP status where
+    available and from the message otherwise"""
+    from yt_dlp.networking.exceptions import HTTPError, TransportError
+    from yt_dlp.utils import GeoRestrictedError
+
+    for exc in exception_chain(error):
+        if isinstance(exc, CircuitOpenError):
+            return "blocked"
+        if isinstance(exc, HTTPError):
+            if exc.status in (403, 429):
+                return "blocked"
+            if exc.status == 404:
+                return "not_found"
+        if isinstance(exc, GeoRestrictedError):
+            return "unavailable"
+        if isinstance(exc, (TransportError, socket.timeout)):
+            return "network"
+    return classify_error(str(error))
+
+
+def record_upstream_outcome(error=None):
+    """Feed the result of a yt-dlp call to the circuit breaker"""
+    if error is None:
+        circuit_breaker.record_success()
+        return
+    if any(isinstance(exc, CircuitOpenError) for exc in exception_chain(error)):
+        return  # refused by the breaker itself, not by upstream
+    error_class = classify_exception(error)
+    if error_class == "blocked":
+        circuit_breaker.record_failure()
+    elif error_class != "network":
+        # Not found, private, etc. still mean upstream is answering
+        circuit_breaker.record_success()
+
+
+def friendly_error(error_msg, error_class=None):
+    """Turn a yt-dlp/ffmpeg error message into one for end users"""
+    return ERROR_MESSAGES.get(
+        error_class or classify_error(error_msg), f"💥 Download failed: {error_msg}"
+    )
+
+
+def fail_download(download_id, flight_key, error):
+    """Record a job failure and let later requests retry the video"""
+    logger.error(f"Download error: {str(error)}")
+    error_class = classify_exception(error)
+    job_errors.inc(error_class=error_class)
+    job_store.update(
+        download_id,
+        status="error",
+        progress=0,
+        error=friendly_error(str(error), error_class),
+        error_class=error_class,
+        finished_at=time.time(),
+    )
+    # Later requests for this video start a fresh job or hit the cache
+    if flight_key:
+        job_store.release(flight_key, download_id)
+    finish_followers(download_id)
+
+
+def flight_key_for(video_id, outputs):
+    """Single-flight key for a video's set of renditions, or None without an ID"""
+    if not video_id:
+        return None
+    return "+".join(
+        transcode_cache.key(video_id, output["name"], output["bitrate"])
+        for output in outputs
+    )
 
 
-def download_audio_thread(url, download_id, output_path):
-    """Download audio in a separate thread"""
+def fetch_source_ranged(ydl, url, info, download_id, output_path):
+    """Download the selected audio stream with parallel Range requests.
+
+    Returns (info, path) with the resolved info dict. path is None when
+    the selected format is not a single plain HTTP stream or the server
+    does not honour ranges; the caller then hands the same info to
+    yt-dlp's own downloader, so nothing is extracted twice.
+    """
+    if info is None:
+        info = ydl.extract_info(url, download=False)
+    else:
+        # Re-run format selection with this job's format selector
+        info = ydl.process_ie_result(copy.deepcopy(info), download=False)
+
+    if (
+        info.get("requested_formats")
+        or info.get("fragments")
+        or info.get("protocol") not in ("http", "https")
+        or not info.get("url")
+    ):
+        return info, None
+
+    source_path = os.path.join(output_path, f"{download_id}.{info['ext']}")
+    partial_path = f"{source_path}.part"
+    hook = ProgressHook(download_id)
+    try:
+        fetch_ranged(
+            info["url"],
+            info.get("http_headers") or {},
+            partial_path,
+            Config.PARALLEL_FETCH_CHUNK_SIZE,
+            Config.PARALLEL_FETCH_CONNECTIONS,
+            retries=Config.PARALLEL_FETCH_RETRIES,
+            progress=lambda done, total: hook(
+                {
+                    "status": "downloading",
+                    "downloaded_bytes": done,
+                    "total_bytes": total,
+                    "tmpfilename": partial_path,
+                }
+            ),
+            rate_governor=rate_governor,
+            max_bytes=Config.MAX_DOWNLOAD_SIZE,
+            circuit_breaker=circuit_breaker,
+        )
+    except RangeNotSupported as e:
+        logger.info(f"Ranged fetch unavailable, using single stream: {str(e)}")
+        Path(partial_path).unlink(missing_ok=True)
+        return info, None
+    os.replace(partial_path, source_path)
+    hook({"status": "finished", "filename": source_path})
+    return info, source_path
+
+
+def download_audio_thread(
+    url, download_id, output_path, video_id=None, outputs=None
+):
+    """Fetch stage: download the source audio on an I/O pool worker.
+
+    No postprocessing happens here; the file is handed to the transcode
+    pool, blocking while that stage's queue is full. The source is
+    fetched once however many renditions the job produces.
+    """
+    from yt_dlp.utils import DownloadError
+
+    if outputs is None:
+        outputs = [negotiate_output(Config.AUDIO_CODEC, Config.AUDIO_QUALITY)]
+    flight_key = flight_key_for(video_id, outputs)
     try:
+        job = job_store.get(download_id) or {}
+        if "queued_at" in job:
+            stage_seconds.observe(time.time() - job["queued_at"], stage="queue_wait")
+        job_store.update(download_id, status="started")
+
         # Create a unique filename
         filename = f"{download_id}.%(ext)s"
         full_path = os.path.join(output_path, filename)
 
         ydl_opts = {
-            "format": "bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best[height<=720]",
+            "format": source_selector(outputs),
             "outtmpl": full_path,
             "progress_hooks": [ProgressHook(download_id)],
-            "postprocessors": [
-                {
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "192",
-                }
-            ],
             "quiet": True,
             "no_warnings": True,
             # Enhanced anti-detection measures
@@ -143,60 +680,515 @@ def download_audio_thread(url, download_id, output_path):
                 "Sec-Fetch-Site": "none",
                 "Upgrade-Insecure-Requests": "1",
             },
-            # Retry settings
-            "extractor_retries": 3,
+            # Retry settings; blocks are handled by the circuit breaker,
+            # so retries only need to ride out transient network errors
+            "extractor_retries": 1,
             "fragment_retries": 3,
             "retry_sleep_functions": {
-                "http": lambda n: min(2**n, 30),
-                "fragment": lambda n: min(2**n, 30),
+                "http": lambda n: min(2**n, 10),
+                "fragment": lambda n: min(2**n, 10),
             },
-            # Additional options to avoid rate limiting
-            "sleep_interval": 1,
-            "max_sleep_interval": 3,
-            "sleep_interval_subtitles": 1,
             # YouTube-specific options
             "youtube_include_dash_manifest": False,
             "youtube_include_hls_manifest": False,
             # Network options
             "socket_timeout": 30,
             "retries": 5,
+            # Backstop for streams whose size was unknown at admission
+            "max_filesize": Config.MAX_DOWNLOAD_SIZE,
         }
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+        # Fail fast while upstream is blocking us; may make this job the
+        # half-open probe
+        circuit_breaker.allow()
+
+        fetch_started = time.perf_counter()
+        # Pacing comes from the shared rate governor, not fixed sleeps
+        with governed_ydl(ydl_opts) as ydl:
+            try:
+                info = resolved_info_cache.get(video_id) if video_id else None
+                if info is not None and resolved_urls_expired(info):
+                    info = None
+                source_path = None
+                if Config.PARALLEL_FETCH:
+                    info, source_path = fetch_source_ranged(
+                        ydl, url, info, download_id, output_path
+                    )
+                if source_path is not None:
+                    result = info
+                elif info is not None:
+                    try:
+                        # Same path as --load-info-json: no second extraction
+                        result = ydl.process_ie_result(
+                            copy.deepcopy(info), download=True
+                        )
+                    except DownloadError as e:
+                        logger.info(
+                            f"Resolved stream unusable, re-extracting: {str(e)}"
+                        )
+                        resolved_info_cache.pop(video_id)
+                        result = ydl.extract_info(url, download=True)
+                else:
+                    result = ydl.extract_info(url, download=True)
+            except Exception as e:
+                record_upstream_outcome(e)
+                raise
+            record_upstream_outcome()
+
+        result = result or {}
+        if source_path is None:
+            downloads = result.get("requested_downloads") or [{}]
+            source_path = downloads[0].get("filepath") or ydl.prepare_filename(
+                result
+            )
+        source_codec = result.get("acodec")
+        stage_seconds.observe(time.perf_counter() - fetch_started, stage="fetch")
+        if not os.path.exists(source_path):
+            # yt-dlp skips, rather than fails, a download over max_filesize
+            raise ValueError(
+                f"No audio was downloaded; it may exceed the "
+                f"{Config.MAX_DOWNLOAD_SIZE // 2**20} MB size limit"
+            )
+        source_bytes.inc(os.path.getsize(source_path))
 
-        # Update final status
-        download_progress[download_id]["status"] = "completed"
-        download_progress[download_id]["progress"] = 100
+        # Report whether the audio will be copied or re-encoded
+        remux = all(
+            processing_path(output, source_codec) == "remux" for output in outputs
+        )
+        job_store.update(
+            download_id,
+            source_codec=source_codec,
+            processing="remux" if remux else "transcode",
+        )
+
+        transcode_scheduler.submit(
+            download_id,
+            transcode_audio_thread,
+            download_id,
+            output_path,
+            source_path,
+            video_id,
+            outputs,
+            time.perf_counter(),
+            block=True,
+            cost=result.get("duration"),
+        )
 
     except Exception as e:
-        logger.error(f"Download error: {str(e)}")
-        # More detailed error handling
-        error_msg = str(e)
-        if "403" in error_msg or "Forbidden" in error_msg:
-            error_msg = "⚠️ YouTube has temporarily blocked this request. This is likely due to rate limiting. Please wait a few minutes and try again, or try a different video."
-        elif "404" in error_msg:
-            error_msg = "❌ Video not found. The video might be private, deleted, or the URL is incorrect."
-        elif "unavailable" in error_msg.lower():
-            error_msg = "🚫 Video is unavailable in your region or has been removed."
-        elif "Sign in to confirm your age" in error_msg:
-            error_msg = "🔞 This video is age-restricted and cannot be downloaded without authentication."
-        elif "Private video" in error_msg:
-            error_msg = "🔒 This is a private video and cannot be downloaded."
-        elif "Video unavailable" in error_msg:
-            error_msg = (
-                "📹 Video is unavailable. It may have been removed or made private."
+        fail_download(download_id, flight_key, e)
+
+
+def extract_audio(source_path, output):
+    """Produce one rendition with the postprocessor yt-dlp would run.
+
+    It stream-copies when the source codec already matches. Returns the
+    output path.
+    """
+    import yt_dlp
+    from yt_dlp.postprocessor import FFmpegExtractAudioPP
+
+    quality = None if output["bitrate"] == "copy" else output["bitrate"]
+    with yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True}) as ydl:
+        extractor = FFmpegExtractAudioPP(
+            ydl, preferredcodec=output["codec"], preferredquality=quality
+        )
+        source_path = str(source_path)
+        files_to_delete, info = extractor.run(
+            {
+                "filepath": source_path,
+                "ext": Path(source_path).suffix.lstrip("."),
+                "vcodec": "none",
+            }
+        )
+    for path in files_to_delete:
+        if path != info["filepath"]:
+            Path(path).unlink(missing_ok=True)
+    return Path(info["filepath"])
+
+
+def transcode_audio_thread(
+    download_id, output_path, source_path, video_id, outputs, handed_off_at=None
+):
+    """Transcode stage: run ffmpeg on a CPU pool worker and publish the result.
+
+    Several renditions come from one ffmpeg run that decodes the source
+    once; a single rendition goes through yt-dlp's own postprocessor.
+    """
+    flight_key = flight_key_for(video_id, outputs)
+    try:
+        if handed_off_at is not None:
+            stage_seconds.observe(
+                time.perf_counter() - handed_off_at, stage="transcode_wait"
             )
-        elif "network" in error_msg.lower() or "timeout" in error_msg.lower():
-            error_msg = "🌐 Network error occurred. Please check your internet connection and try again."
+        job_store.update(download_id, status="transcoding")
+        job = job_store.get(download_id) or {}
+        renditions = job.get("renditions")
+        if renditions:
+            # Renditions already served from the cache need no work
+            outputs = [
+                output
+                for output in outputs
+                if renditions[rendition_key(output)]["status"] != "completed"
+            ]
+
+        with stage_seconds.time(stage="transcode"):
+            if len(outputs) == 1:
+                produced = {
+                    rendition_key(outputs[0]): extract_audio(source_path, outputs[0])
+                }
+            else:
+                produced = encode_renditions(
+                    source_path,
+                    outputs,
+                    job.get("source_codec"),
+                    output_path,
+                    download_id,
+                )
+                Path(source_path).unlink(missing_ok=True)
+
+        # Publish into the shared cache so later requests skip the download
+        published = {}
+        if video_id:
+            with stage_seconds.time(stage="publish"):
+                for output in outputs:
+                    key = rendition_key(output)
+                    if produced[key].exists():
+                        cached_path = transcode_cache.publish(
+                            video_id, output["name"], output["bitrate"], produced[key]
+                        )
+                        published[key] = str(cached_path)
+
+        # Update final status
+        fields = {}
+        if renditions:
+            for key, path in produced.items():
+                renditions[key].update(
+                    status="completed", file_path=published.get(key, str(path))
+                )
+            fields["renditions"] = renditions
+            fields["file_path"] = next(iter(renditions.values()))["file_path"]
+        elif published:
+            fields["file_path"] = next(iter(published.values()))
+        if len(published) == len(outputs):
+            shutil.rmtree(output_path, ignore_errors=True)
+        job_store.update(
+            download_id,
+            status="completed",
+            progress=100,
+            finished_at=time.time(),
+            **fields,
+        )
+        if flight_key:
+            job_store.release(flight_key, download_id)
+        finish_followers(download_id)
+
+    except Exception as e:
+        fail_download(download_id, flight_key, e)
+
+
+def job_outputs(job):
+    """Output specs a job record asks for, primary rendition first"""
+    if "renditions" in job:
+        return [
+            negotiate_output(rendition["format"], rendition["bitrate"])
+            for rendition in job["renditions"].values()
+        ]
+    return [negotiate_output(job["output_format"], job["bitrate"])]
+
+
+def process_owner():
+    """Identifier of this server process, recorded on the jobs it runs"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def owner_alive(owner):
+    """Whether the process that owns a job is still running"""
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname():
+        # Another machine's job (or no owner): not ours to judge
+        return bool(owner)
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recover_interrupted_jobs():
+    """Resume jobs whose owning process died (restart, worker recycle).
+
+    The job keeps its download ID and working directory, so yt-dlp
+    continues from the .part file instead of starting over. Taking over
+    is a compare-and-set on the owner field, so only one worker resumes
+    each job.
+    """
+    resumed = 0
+    for download_id, job in job_store.items():
+        if job.get("type") == "batch":
+            # Coordinators are not resumed; finish the record so it expires
+            if job.get("status") not in ("completed", "error") and not owner_alive(
+                job.get("owner")
+            ):
+                job_store.update_if(
+                    download_id,
+                    {"owner": job.get("owner")},
+                    status="error",
+                    error="💥 Batch interrupted by a server restart",
+                    finished_at=time.time(),
+                )
+            continue
+        if job.get("status") not in (
+            "queued",
+            "started",
+            "downloading",
+            "finished",
+            "transcoding",
+        ):
+            continue
+        if "remote_peer" in job:
+            # The job itself kept running on its peer; follow it again
+            if (
+                cluster is not None
+                and not owner_alive(job.get("owner"))
+                and job_store.update_if(
+                    download_id, {"owner": job.get("owner")}, owner=process_owner()
+                )
+            ):
+                start_remote_mirror(download_id)
+            continue
+        if "leader" in job or "url" not in job or owner_alive(job.get("owner")):
+            continue
+        if not job_store.update_if(
+            download_id,
+            {"owner": job.get("owner")},
+            owner=process_owner(),
+            status="queued",
+            recovered=True,
+        ):
+            continue
+
+        temp_dir = job.get("temp_dir")
+        if temp_dir:
+            os.makedirs(temp_dir, exist_ok=True)
         else:
-            error_msg = f"💥 Download failed: {error_msg}"
+            os.makedirs(Config.WORK_DIR, exist_ok=True)
+            temp_dir = tempfile.mkdtemp(
+                prefix=f"yt_download_{download_id}_", dir=Config.WORK_DIR
+            )
+            job_store.update(download_id, temp_dir=temp_dir)
+        try:
+            download_scheduler.submit(
+                download_id,
+                download_audio_thread,
+                job["url"],
+                download_id,
+                temp_dir,
+                job.get("video_id"),
+                job_outputs(job),
+                cost=job.get("estimated_duration"),
+            )
+            resumed += 1
+        except (QueueFullError, ValueError) as e:
+            job_store.update(
+                download_id,
+                status="error",
+                progress=0,
+                error=f"💥 Download interrupted and could not be resumed: {str(e)}",
+                finished_at=time.time(),
+            )
+    if resumed:
+        logger.info(f"Resumed {resumed} interrupted download(s)")
+    return resumed
 
-        download_progress[download_id] = {
-            "status": "error",
-            "progress": 0,
-            "error": error_msg,
+
+def cached_renditions(video_id, outputs):
+    """Transcode cache paths of the outputs already cached, by rendition key"""
+    cached = {}
+    for output in outputs:
+        cached_path = transcode_cache.lookup(
+            video_id, output["name"], output["bitrate"], output["extensions"]
+        )
+        cache_lookups.inc(cache="transcode", result="hit" if cached_path else "miss")
+        if cached_path:
+            cached[rendition_key(output)] = str(cached_path)
+    return cached
+
+
+def cached_job(outputs, cached):
+    """Completed job record served from the cache; every output must be cached"""
+    output = outputs[0]
+    job = {
+        "status": "completed",
+        "progress": 100,
+        "finished_at": time.time(),
+        "file_path": cached[rendition_key(output)],
+        "cached": True,
+        "output_format": output["name"],
+        "processing": "cache",
+    }
+    if len(outputs) > 1:
+        job["renditions"] = {
+            rendition_key(rendition): {
+                "format": rendition["name"],
+                "bitrate": rendition["bitrate"],
+                "status": "completed",
+                "file_path": cached[rendition_key(rendition)],
+            }
+            for rendition in outputs
         }
+    return job
+
+
+def attach_follower(leader_id, download_id):
+    """List a coalesced job on its leader, for finish_followers"""
+    while True:
+        leader = job_store.get(leader_id)
+        if leader is None:
+            return
+        followers = leader.get("followers")
+        # Compare-and-set, since other requests may attach at the same time
+        if job_store.update_if(
+            leader_id,
+            {"followers": followers},
+            followers=(followers or []) + [download_id],
+        ):
+            return
+
+
+def follower_record(leader_id, leader):
+    """A follower's copy of its finished leader's outcome"""
+    record = dict(leader, leader=leader_id)
+    record.pop("followers", None)
+    return record
+
+
+def finish_followers(download_id):
+    """Save a finished job's outcome into the jobs coalesced onto it.
+
+    Followers then keep the result (and expire like any finished job)
+    after the leader's own record is cleaned up.
+    """
+    leader = job_store.get(download_id)
+    if leader is None:
+        return
+    for follower_id in leader.get("followers") or []:
+        follower = job_store.get(follower_id)
+        if follower is not None and follower.get("status") not in (
+            "completed",
+            "error",
+        ):
+            job_store.set(follower_id, follower_record(download_id, leader))
+
+
+def get_job(download_id):
+    """Job record for a download ID, following shared-download links.
+
+    Requests coalesced onto another job keep a "leader" pointer and
+    report the leader's state under their own download ID. A follower
+    whose leader record is gone is served from the transcode cache if
+    the renditions are there, and fails otherwise.
+    """
+    job = job_store.get(download_id)
+    if job is None or "leader" not in job or job["status"] in ("completed", "error"):
+        return job
+
+    leader = job_store.get(job["leader"])
+    if leader is None:
+        cached = {}
+        if job.get("video_id"):
+            outputs = job_outputs(job)
+            cached = cached_renditions(job["video_id"], outputs)
+        if cached and len(cached) == len(outputs):
+            outcome = cached_job(outputs, cached)
+        else:
+            outcome = {
+                "status": "error",
+                "progress": 0,
+                "error": "Shared download expired, please try again",
+                "finished_at": time.time(),
+            }
+        outcome["leader"] = job["leader"]
+        job_store.set(download_id, outcome)
+        return outcome
+    if leader["status"] in ("completed", "error"):
+        # Keep the outcome once the leader's own record is cleaned up
+        leader = follower_record(job["leader"], leader)
+        job_store.set(download_id, leader)
+        return leader
+    leader["leader"] = job["leader"]
+    return leader
+
+
+def owner_peer(video_id):
+    """Peer that should serve this request for video_id, or None for us"""
+    if cluster is None or request.headers.get(FORWARDED_HEADER):
+        return None
+    return cluster.owner(video_id)
+
+
+def forward_request(peer):
+    """Send the current request to a peer; None if it is unreachable"""
+    headers = {
+        name: request.headers[name]
+        for name in FORWARDED_REQUEST_HEADERS
+        if name in request.headers
+    }
+    try:
+        return cluster.forward(
+            peer,
+            request.method,
+            request.path,
+            params=request.args,
+            data=request.get_data(),
+            headers=headers,
+        )
+    except PeerUnavailable as e:
+        logger.warning(f"{str(e)}; handling the request here")
+        return None
+
+
+def relay_response(peer_response):
+    """Stream a peer's response back to the client"""
+    headers = {
+        name: peer_response.headers[name]
+        for name in RELAYED_RESPONSE_HEADERS
+        if name in peer_response.headers
+    }
+
+    def body():
+        try:
+            yield from peer_response.iter_content(chunk_size=None)
+        finally:
+            peer_response.close()
+
+    return Response(
+        body(),
+        status=peer_response.status_code,
+        headers=headers,
+        direct_passthrough=True,
+    )
+
+
+def relay_job_request(download_id):
+    """Relay a request about a job that runs on a peer, or None if it is ours.
+
+    Downloads forwarded to their owner leave a "peer" pointer record on
+    the node that accepted them, so clients can keep using that node.
+    """
+    job = job_store.get(download_id)
+    if job is None or "peer" not in job or cluster is None:
+        return None
+    peer_response = forward_request(job["peer"])
+    if peer_response is None:
+        return jsonify(
+            {
+                "success": False,
+                "error": "The server running this download is unavailable",
+            }
+        ), 502
+    return relay_response(peer_response)
 
 
 @app.route("/api/video-info", methods=["POST"])
@@ -209,7 +1201,17 @@ def video_info():
         if not url:
             return jsonify({"success": False, "error": "URL is required"}), 400
 
-        info = get_video_info(url)
+        video_id = extract_video_id(url)
+        if not video_id:
+            return jsonify({"success": False, "error": "Invalid YouTube URL"}), 400
+
+        # The owner node keeps the resolved info its download will reuse
+        peer = owner_peer(video_id)
+        peer_response = forward_request(peer) if peer else None
+        if peer_response is not None:
+            return relay_response(peer_response)
+
+        info = get_video_info(video_id)
         return jsonify(info)
 
     except Exception as e:
@@ -217,6 +1219,187 @@ def video_info():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+class VideoUnavailableError(Exception):
+    """Raised at admission for a video that can never be downloaded"""
+
+    def __init__(self, message, error_class):
+        super().__init__(message)
+        self.error_class = error_class
+
+
+def admission_estimate(video_id, outputs, metadata=None):
+    """Estimate a job's cost from its metadata and enforce the limits.
+
+    Uses the given metadata, else the info /api/video-info resolved, else
+    extracts it now (which the download then reuses). Raises
+    JobTooLargeError for jobs over MAX_DOWNLOAD_SIZE or MAX_DURATION and
+    VideoUnavailableError when the lookup failed for good (private,
+    removed...); returns None when the metadata cannot be fetched now.
+    """
+    info = metadata or resolved_info_cache.get(video_id)
+    if info is None:
+        result = get_video_info(video_id)
+        if not result["success"]:
+            if permanent_failure(result):
+                error_class = result.get("error_class") or "unavailable"
+                raise VideoUnavailableError(
+                    friendly_error(result["error"], error_class), error_class
+                )
+            # Let the download itself retry and report the error
+            return None
+        info = resolved_info_cache.get(video_id) or result
+    # The largest rendition decides whether the job fits
+    estimate = max(
+        (estimate_cost(info, output) for output in outputs),
+        key=lambda estimate: estimate["output_bytes"] or 0,
+    )
+    check_limits(estimate, Config.MAX_DOWNLOAD_SIZE, Config.MAX_DURATION)
+    return estimate
+
+
+def queue_download(video_id, outputs, block=False, metadata=None):
+    """Create a download job for a video and hand it to the fetch pool.
+
+    outputs lists the renditions to produce, primary first; a job with
+    several tracks each one under "renditions". Renditions in the cache
+    are ready at once, and the job completes immediately if all are.
+    Requests for the same renditions already in flight attach to that
+    job. Returns the client-facing response body.
+    Raises CircuitOpenError while upstream is blocking us,
+    JobTooLargeError for videos over the size or duration limits,
+    VideoUnavailableError for videos that cannot be downloaded at all,
+    and QueueFullError when the pool is full (or waits for room with
+    block=True). metadata, if known, saves looking the video up for the
+    admission estimate; only the job that claims the flight does that.
+    """
+    # Generate unique download ID
+    download_id = str(uuid.uuid4())
+
+    # Serve straight from the transcode cache when we already have it
+    cached = cached_renditions(video_id, outputs)
+
+    output = outputs[0]
+    renditions = None
+    if len(outputs) > 1:
+        renditions = {}
+        for rendition in outputs:
+            key = rendition_key(rendition)
+            renditions[key] = {
+                "format": rendition["name"],
+                "bitrate": rendition["bitrate"],
+                "status": "completed" if key in cached else "queued",
+                "file_path": cached.get(key),
+            }
+
+    if len(cached) == len(outputs):
+        job_store.set(download_id, cached_job(outputs, cached))
+        return {
+            "success": True,
+            "download_id": download_id,
+            "queue_position": 0,
+            "message": "Download ready",
+        }
+
+    # Refuse new work at once while YouTube is blocking us
+    retry_after = circuit_breaker.retry_after()
+    if retry_after:
+        raise CircuitOpenError(retry_after)
+
+    # Initialize progress tracking; source details let a restarted
+    # server resume the job (see recover_interrupted_jobs)
+    job = {
+        "status": "queued",
+        "progress": 0,
+        "queued_at": time.time(),
+        "url": video_url(video_id),
+        "video_id": video_id,
+        "output_format": output["name"],
+        "bitrate": output["bitrate"],
+        "owner": process_owner(),
+    }
+    if renditions:
+        job["renditions"] = renditions
+    job_store.set(download_id, job)
+
+    # Attach to an in-flight job for the same video instead of downloading
+    # twice. The flight is claimed before the admission estimate, so a
+    # burst of requests for one video costs a single metadata lookup.
+    flight_key = flight_key_for(video_id, outputs)
+    leader_id = job_store.claim(flight_key, download_id, Config.INFLIGHT_TTL)
+    if leader_id != download_id:
+        # The video and renditions stay on the record, so it can still be
+        # served from the cache once the leader's record is gone
+        job_store.set(download_id, dict(job, leader=leader_id))
+        attach_follower(leader_id, download_id)
+        return {
+            "success": True,
+            "download_id": download_id,
+            "shared": True,
+            "message": "Download attached to an existing job",
+        }
+
+    # Reject oversized or unavailable videos before they take a worker;
+    # jobs attached meanwhile report the rejection through this record
+    try:
+        estimate = admission_estimate(video_id, outputs, metadata) or {}
+    except Exception as e:
+        job_store.update(
+            download_id,
+            status="error",
+            error=str(e),
+            finished_at=time.time(),
+        )
+        job_store.release(flight_key, download_id)
+        finish_followers(download_id)
+        raise
+
+    # Working directory for this download; kept outside the system temp
+    # dir so partial files survive a reboot
+    os.makedirs(Config.WORK_DIR, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix=f"yt_download_{download_id}_", dir=Config.WORK_DIR)
+    job_store.update(
+        download_id,
+        temp_dir=temp_dir,
+        estimated_duration=estimate.get("duration"),
+        estimated_bytes=estimate.get("output_bytes"),
+    )
+
+    # Hand the job to the worker pool
+    try:
+        position = download_scheduler.submit(
+            download_id,
+            download_audio_thread,
+            video_url(video_id),
+            download_id,
+            temp_dir,
+            video_id,
+            outputs,
+            block=block,
+            cost=estimate.get("duration"),
+        )
+    except QueueFullError:
+        job_store.delete(download_id)
+        job_store.release(flight_key, download_id)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+    return {
+        "success": True,
+        "download_id": download_id,
+        "queue_position": position,
+        "message": "Download queued" if position else "Download started",
+    }
+
+
+def retry_later_response(status, error, retry_after, **fields):
+    """JSON error response carrying a Retry-After header"""
+    response = jsonify(
+        {"success": False, "error": error, "retry_after": retry_after, **fields}
+    )
+    response.headers["Retry-After"] = str(retry_after)
+    return response, status
+
+
 @app.route("/api/download", methods=["POST"])
 def start_download():
     """Start audio download endpoint"""
@@ -227,43 +1410,698 @@ def start_download():
         if not url:
             return jsonify({"success": False, "error": "URL is required"}), 400
 
-        # Generate unique download ID
-        download_id = str(uuid.uuid4())
+        # Reject anything that is not a video link before any yt-dlp work
+        video_id = extract_video_id(url)
+        if not video_id:
+            return jsonify({"success": False, "error": "Invalid YouTube URL"}), 400
+
+        peer = owner_peer(video_id)
+        peer_response = forward_request(peer) if peer else None
+        if peer_response is not None:
+            try:
+                body = peer_response.json()
+            except ValueError:
+                # Not one of our JSON answers (e.g. a proxy error page);
+                # pass it on unchanged
+                body = {}
+            if isinstance(body, dict) and body.get("download_id"):
+                # Progress and file requests for this ID are relayed to the
+                # owner; the pointer expires like a finished job
+                job_store.set(
+                    body["download_id"],
+                    {
+                        "status": "forwarded",
+                        "peer": peer,
+                        "finished_at": time.time(),
+                    },
+                )
+            return relay_response(peer_response)
+
+        # Work out the cheapest way to produce the requested format(s)
+        try:
+            if "renditions" in data:
+                outputs = negotiate_renditions(
+                    data["renditions"], Config.AUDIO_QUALITY
+                )
+            else:
+                outputs = [
+                    negotiate_output(
+                        data.get("format", Config.AUDIO_CODEC),
+                        data.get("bitrate", Config.AUDIO_QUALITY),
+                    )
+                ]
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        try:
+            return jsonify(queue_download(video_id, outputs))
+        except CircuitOpenError as e:
+            return retry_later_response(
+                503, ERROR_MESSAGES["blocked"], e.retry_after, error_class="blocked"
+            )
+        except QueueFullError as e:
+            return retry_later_response(
+                429, "Server is busy, please try again shortly", e.retry_after
+            )
+        except JobTooLargeError as e:
+            return jsonify({"success": False, "error": str(e)}), 413
+        except VideoUnavailableError as e:
+            return (
+                jsonify(
+                    {"success": False, "error": str(e), "error_class": e.error_class}
+                ),
+                422,
+            )
+
+    except Exception as e:
+        logger.error(f"Download start error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+def expand_batch_source(source):
+    """Videos in a playlist (or single video) URL, via flat extraction.
+
+    Flat extraction lists the entries without resolving each video, so
+    a long playlist costs one request instead of one per item.
+    """
+    circuit_breaker.allow()
+    ydl_opts = {
+        "quiet": True,
+        "no_warnings": True,
+        "extract_flat": "in_playlist",
+        "playlistend": Config.BATCH_MAX_ITEMS,
+        "user_agent": get_random_user_agent(),
+        "referer": "https://www.youtube.com/",
+    }
+    with governed_ydl(ydl_opts) as ydl:
+        try:
+            info = ydl.extract_info(source, download=False)
+        except Exception as e:
+            record_upstream_outcome(e)
+            raise
+        record_upstream_outcome()
+
+    entries = info.get("entries") if info.get("_type") == "playlist" else [info]
+    items = []
+    for entry in entries or []:
+        url = entry and (entry.get("webpage_url") or entry.get("url"))
+        video_id = extract_video_id(url) if url else None
+        if video_id:
+            items.append(
+                {
+                    "url": video_url(video_id),
+                    "video_id": video_id,
+                    "title": entry.get("title"),
+                    "duration": entry.get("duration"),
+                }
+            )
+    return items[: Config.BATCH_MAX_ITEMS]
+
+
+def unfinished_jobs(download_ids):
+    """How many of the given jobs are still queued or running"""
+    count = 0
+    for download_id in download_ids:
+        job = get_job(download_id)
+        if job is not None and job["status"] not in ("completed", "error"):
+            count += 1
+    return count
+
+
+class RemoteJobError(Exception):
+    """A peer refused or failed a job sent to it; the message is for clients"""
 
-        # Create temporary directory for this download
-        temp_dir = tempfile.mkdtemp(prefix=f"yt_download_{download_id}_")
 
-        # Initialize progress tracking
-        download_progress[download_id] = {
-            "status": "started",
+def queue_remote_download(peer, item, output):
+    """Start a batch item on the peer that owns its video.
+
+    A local job mirrors the peer's progress and, once it completes,
+    copies the file here for the batch ZIP; the peer keeps its cached
+    copy for the rest of the cluster. Waits while the peer is busy, like
+    queue_download with block=True. Returns the local download ID, or
+    None if the peer is unreachable (the item is then downloaded here).
+    Raises RemoteJobError if the peer refuses the job.
+    """
+    payload = {
+        "url": item["url"],
+        "format": output["name"],
+        "bitrate": output["bitrate"],
+    }
+    while True:
+        try:
+            response = cluster.forward(peer, "POST", "/api/download", json=payload)
+        except PeerUnavailable as e:
+            logger.warning(f"{str(e)}; downloading the batch item here")
+            return None
+        with response:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+        if response.status_code != 429:
+            break
+        time.sleep(max(1, int(response.headers.get("Retry-After") or 1)))
+    if not (isinstance(body, dict) and body.get("download_id")):
+        raise RemoteJobError(
+            (body.get("error") if isinstance(body, dict) else None)
+            or f"💥 Download failed on {peer} (HTTP {response.status_code})"
+        )
+
+    download_id = str(uuid.uuid4())
+    os.makedirs(Config.WORK_DIR, exist_ok=True)
+    job_store.set(
+        download_id,
+        {
+            "status": "queued",
+            "progress": 0,
+            "queued_at": time.time(),
+            "video_id": item["video_id"],
+            "output_format": output["name"],
+            "bitrate": output["bitrate"],
+            "remote_peer": peer,
+            "remote_id": body["download_id"],
+            "temp_dir": tempfile.mkdtemp(
+                prefix=f"yt_download_{download_id}_", dir=Config.WORK_DIR
+            ),
+            "owner": process_owner(),
+        },
+    )
+    start_remote_mirror(download_id)
+    return download_id
+
+
+def start_remote_mirror(download_id):
+    """Run mirror_remote_download for a local job on its own thread"""
+    threading.Thread(
+        target=mirror_remote_download,
+        args=(download_id,),
+        name="remote-mirror",
+        daemon=True,
+    ).start()
+
+
+def mirror_remote_download(download_id):
+    """Follow a job running on its owner peer, then copy its file here"""
+    job = job_store.get(download_id)
+    peer, remote_id = job["remote_peer"], job["remote_id"]
+    try:
+        while True:
+            with cluster.forward(peer, "GET", f"/api/progress/{remote_id}") as response:
+                body = response.json()
+            progress = body.get("progress") or {}
+            if not body.get("success") or progress.get("status") == "error":
+                raise RemoteJobError(
+                    progress.get("error") or body.get("error") or "💥 Download failed"
+                )
+            if progress.get("status") == "completed":
+                break
+            job_store.update(
+                download_id,
+                status=progress.get("status", "queued"),
+                progress=progress.get("progress", 0),
+            )
+            time.sleep(Config.SSE_POLL_INTERVAL)
+
+        with cluster.forward(peer, "GET", f"/api/download/{remote_id}") as response:
+            if response.status_code != 200:
+                raise RemoteJobError(
+                    f"💥 Could not fetch the file from {peer} "
+                    f"(HTTP {response.status_code})"
+                )
+            _, params = parse_options_header(
+                response.headers.get("Content-Disposition", "")
+            )
+            suffix = Path(params.get("filename", "")).suffix
+            # Found by completed_file like any file in the job's directory
+            path = Path(job["temp_dir"]) / f"{download_id}{suffix}"
+            with open(path, "wb") as f:
+                for chunk in response.iter_content(Config.STREAM_CHUNK_SIZE):
+                    f.write(chunk)
+        job_store.update(
+            download_id, status="completed", progress=100, finished_at=time.time()
+        )
+    except Exception as e:
+        logger.error(f"Remote download {remote_id} on {peer} failed: {str(e)}")
+        if isinstance(e, PeerUnavailable):
+            error = "The server running this download is unavailable"
+        elif isinstance(e, RemoteJobError):
+            error = str(e)
+        else:
+            error = friendly_error(str(e), classify_exception(e))
+        job_store.update(
+            download_id,
+            status="error",
+            progress=0,
+            error=error,
+            finished_at=time.time(),
+        )
+
+
+def run_batch(batch_id, output):
+    """Batch coordinator: expand the source and feed items to the fetch pool.
+
+    At most BATCH_PARALLELISM items are unfinished at once, so a large
+    playlist cannot take over the shared pool. The coordinator stays
+    until every item has finished, then closes the batch record.
+    """
+    try:
+        batch = job_store.get(batch_id)
+        if batch is None:
+            return
+        items = batch["items"]
+        if batch.get("source"):
+            items = expand_batch_source(batch["source"])
+            if not items:
+                raise ValueError("No videos found at this URL")
+        job_store.update(batch_id, status="running", items=items, total=len(items))
+
+        children = []
+        for item in items:
+            while unfinished_jobs(children) >= Config.BATCH_PARALLELISM:
+                time.sleep(Config.SSE_POLL_INTERVAL)
+            try:
+                if not item.get("title"):
+                    # URL-list items: the metadata admission needs anyway
+                    # (cached for it and the download) names the ZIP entry
+                    info = get_video_info(item["video_id"])
+                    if info["success"]:
+                        item["title"] = info["title"]
+                # Each item is downloaded by the node that owns its video,
+                # like a single download; this node mirrors the result
+                download_id = None
+                peer = cluster.owner(item["video_id"]) if cluster else None
+                if peer:
+                    download_id = queue_remote_download(peer, item, output)
+                if download_id is None:
+                    # Flat playlist entries carry the duration, which is
+                    # enough for the admission estimate
+                    metadata = item if item.get("duration") else None
+                    result = queue_download(
+                        item["video_id"], [output], block=True, metadata=metadata
+                    )
+                    download_id = result["download_id"]
+                item["download_id"] = download_id
+                children.append(download_id)
+            except (JobTooLargeError, VideoUnavailableError, RemoteJobError) as e:
+                item["error"] = str(e)
+            except Exception as e:
+                item["error"] = friendly_error(str(e), classify_exception(e))
+            job_store.update(batch_id, items=items)
+
+        while unfinished_jobs(children):
+            time.sleep(Config.SSE_POLL_INTERVAL)
+
+        completed = sum(
+            1
+            for download_id in children
+            if (get_job(download_id) or {}).get("status") == "completed"
+        )
+        job_store.update(
+            batch_id,
+            status="completed" if completed else "error",
+            error=None if completed else "💥 No item in this batch could be downloaded",
+            finished_at=time.time(),
+        )
+    except Exception as e:
+        logger.error(f"Batch error: {str(e)}")
+        job_store.update(
+            batch_id,
+            status="error",
+            error=friendly_error(str(e), classify_exception(e)),
+            finished_at=time.time(),
+        )
+
+
+def batch_snapshot(batch_id):
+    """Aggregate progress of a batch and its items, or None if unknown"""
+    batch = job_store.get(batch_id)
+    if batch is None or batch.get("type") != "batch":
+        return None
+
+    counts = {"completed": 0, "failed": 0, "active": 0, "pending": 0}
+    progress_sum = 0.0
+    items = []
+    for index, item in enumerate(batch.get("items") or []):
+        entry = {
+            "index": index,
+            "url": item["url"],
+            "title": item.get("title"),
+            "download_id": item.get("download_id"),
+            "status": "pending",
             "progress": 0,
-            "temp_dir": temp_dir,
         }
+        job = get_job(item["download_id"]) if item.get("download_id") else None
+        if item.get("error"):
+            entry.update(status="error", error=item["error"])
+        elif job is not None:
+            entry.update(status=job["status"], progress=job.get("progress", 0))
+            if job.get("error"):
+                entry["error"] = job["error"]
+        elif item.get("download_id"):
+            entry.update(status="error", error="Download expired")
+
+        if entry["status"] == "completed":
+            counts["completed"] += 1
+            entry["progress"] = 100
+        elif entry["status"] == "error":
+            counts["failed"] += 1
+            entry["progress"] = 100  # finished, for the aggregate
+        elif entry["status"] == "pending":
+            counts["pending"] += 1
+        else:
+            counts["active"] += 1
+        progress_sum += entry["progress"]
+        items.append(entry)
+
+    return {
+        "batch_id": batch_id,
+        "status": batch["status"],
+        "error": batch.get("error"),
+        "total": len(items),
+        **counts,
+        "progress": round(progress_sum / len(items), 1) if items else 0,
+        "items": items,
+    }
+
 
-        # Start download in background thread
-        thread = threading.Thread(
-            target=download_audio_thread, args=(url, download_id, temp_dir)
+def batch_members(batch_id):
+    """(name, path) of each finished batch item, in completion order.
+
+    Blocks between items, so the ZIP built from it streams each file as
+    soon as its job completes.
+    """
+    emitted = set()
+    while True:
+        batch = job_store.get(batch_id)
+        if batch is None:
+            return
+        items = batch.get("items") or []
+        for index, item in enumerate(items):
+            if index in emitted:
+                continue
+            if item.get("error"):
+                emitted.add(index)
+                continue
+            download_id = item.get("download_id")
+            if not download_id:
+                continue
+            job = get_job(download_id)
+            if job is not None and job["status"] not in ("completed", "error"):
+                continue
+            emitted.add(index)
+            found = completed_file(download_id, job) if job else None
+            if found is None or job["status"] != "completed":
+                continue
+            file_path, temp_dir = found
+            title = sanitize_filename(item.get("title") or "") or download_id
+            yield f"{index + 1:03d} - {title}{file_path.suffix}", file_path
+            janitor.schedule(download_id, Config.FETCH_GRACE_PERIOD, temp_dir=temp_dir)
+
+        if batch["status"] in ("completed", "error") and len(emitted) == len(items):
+            return
+        time.sleep(Config.SSE_POLL_INTERVAL)
+
+
+@app.route("/api/batch", methods=["POST"])
+def start_batch():
+    """Start a batch from a list of URLs or a playlist URL"""
+    try:
+        data = request.get_json()
+        urls = data.get("urls")
+        source = data.get("url")
+
+        if bool(urls) == bool(source):
+            return jsonify(
+                {"success": False, "error": "Provide either urls or a playlist url"}
+            ), 400
+        if urls is not None and (
+            not isinstance(urls, list)
+            or not all(isinstance(url, str) and url for url in urls)
+        ):
+            return jsonify(
+                {"success": False, "error": "urls must be a list of URLs"}
+            ), 400
+        if urls and len(urls) > Config.BATCH_MAX_ITEMS:
+            return jsonify(
+                {
+                    "success": False,
+                    "error": f"At most {Config.BATCH_MAX_ITEMS} URLs per batch",
+                }
+            ), 400
+
+        # Reject unparseable links before any yt-dlp work; a watch link
+        # inside a playlist selects the whole playlist
+        items = []
+        if urls:
+            video_ids = [extract_video_id(url) for url in urls]
+            invalid = [url for url, video_id in zip(urls, video_ids) if not video_id]
+            if invalid:
+                return jsonify(
+                    {
+                        "success": False,
+                        "error": "Invalid YouTube URL",
+                        "invalid": invalid,
+                    }
+                ), 400
+            items = [
+                {"url": video_url(video_id), "video_id": video_id, "title": None}
+                for video_id in video_ids
+            ]
+        else:
+            video_id, playlist_id = parse_youtube_url(source)
+            if playlist_id:
+                source = playlist_url(playlist_id)
+            elif video_id:
+                source = video_url(video_id)
+            else:
+                return jsonify({"success": False, "error": "Invalid YouTube URL"}), 400
+
+        try:
+            output = negotiate_output(
+                data.get("format", Config.AUDIO_CODEC),
+                data.get("bitrate", Config.AUDIO_QUALITY),
+            )
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        retry_after = circuit_breaker.retry_after()
+        if retry_after:
+            return retry_later_response(
+                503, ERROR_MESSAGES["blocked"], retry_after, error_class="blocked"
+            )
+
+        batch_id = str(uuid.uuid4())
+        job_store.set(
+            batch_id,
+            {
+                "type": "batch",
+                "status": "queued",
+                "progress": 0,
+                "queued_at": time.time(),
+                "source": source,
+                "items": items,
+                "output_format": output["name"],
+                "bitrate": output["bitrate"],
+                "owner": process_owner(),
+            },
         )
-        thread.daemon = True
-        thread.start()
+        try:
+            batch_scheduler.submit(batch_id, run_batch, batch_id, output)
+        except QueueFullError as e:
+            job_store.delete(batch_id)
+            return retry_later_response(
+                429, "Server is busy, please try again shortly", e.retry_after
+            )
 
         return jsonify(
-            {"success": True, "download_id": download_id, "message": "Download started"}
+            {
+                "success": True,
+                "batch_id": batch_id,
+                "total": len(urls) if urls else None,
+                "message": "Batch started",
+            }
         )
 
     except Exception as e:
-        logger.error(f"Download start error: {str(e)}")
+        logger.error(f"Batch start error: {str(e)}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route("/api/batch/<batch_id>", methods=["GET"])
+def get_batch_progress(batch_id):
+    """Aggregate progress of a batch"""
+    try:
+        snapshot = batch_snapshot(batch_id)
+        if snapshot is None:
+            return jsonify({"success": False, "error": "Batch not found"}), 404
+        return jsonify({"success": True, "batch": snapshot})
+
+    except Exception as e:
+        logger.error(f"Batch progress error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route("/api/batch/<batch_id>/download", methods=["GET"])
+def download_batch(batch_id):
+    """Stream the batch as a ZIP, adding each file as its job completes.
+
+    A response that waits for jobs would hold a sync worker until the
+    Gunicorn timeout kills it, so only async mode serves the ZIP while
+    the batch runs; sync servers answer 409 with Retry-After until it
+    has finished.
+    """
+    batch = job_store.get(batch_id)
+    if batch is None or batch.get("type") != "batch":
+        return jsonify({"success": False, "error": "Batch not found"}), 404
+    if batch["status"] == "error" and not batch.get("items"):
+        return jsonify({"success": False, "error": batch.get("error")}), 409
+    if Config.SERVER_MODE != "async" and batch["status"] not in ("completed", "error"):
+        return retry_later_response(
+            409,
+            "Batch still running; the ZIP is available once it completes",
+            max(1, int(download_scheduler.stats()["avg_job_seconds"])),
+            # The batch record carries no progress; it is aggregated from the items
+            progress=(batch_snapshot(batch_id) or {}).get("progress", 0),
+        )
+
+    return Response(
+        stream_zip(batch_members(batch_id), Config.STREAM_CHUNK_SIZE),
+        mimetype="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="batch-{batch_id}.zip"',
+            "X-Accel-Buffering": "no",
+        },
+        direct_passthrough=True,
+    )
+
+
+@app.route("/api/stream", methods=["GET"])
+def stream_download():
+    """Stream transcoded audio as it is produced, without a temp file.
+
+    Only served in async mode (see AUDIO_STREAMS); clients of a sync
+    server queue a download with /api/download instead.
+    """
+    if not AUDIO_STREAMS:
+        return jsonify(
+            {
+                "success": False,
+                "error": "Streaming needs SERVER_MODE=async; "
+                "use /api/download instead",
+            }
+        ), 501
+    try:
+        url = request.args.get("url")
+        codec = request.args.get("format", Config.AUDIO_CODEC)
+
+        if not url:
+            return jsonify({"success": False, "error": "URL is required"}), 400
+        if codec not in STREAM_FORMATS:
+            return jsonify(
+                {"success": False, "error": f"Unsupported stream format: {codec}"}
+            ), 400
+
+        video_id = extract_video_id(url)
+        if not video_id:
+            return jsonify({"success": False, "error": "Invalid YouTube URL"}), 400
+
+        peer = owner_peer(video_id)
+        peer_response = forward_request(peer) if peer else None
+        if peer_response is not None:
+            return relay_response(peer_response)
+
+        info = resolved_info_cache.get(video_id)
+        if info is None or resolved_urls_expired(info):
+            result = extract_video_info(video_id)
+            if not result["success"]:
+                return jsonify(result), 502
+            info = resolved_info_cache.get(video_id)
+
+        audio_format = pick_audio_format(info) if info else None
+        if audio_format is None:
+            return jsonify(
+                {"success": False, "error": "No audio stream available"}
+            ), 502
+
+        # Same limits as queued downloads
+        try:
+            check_limits(
+                estimate_cost(info, {"bitrate": str(Config.AUDIO_QUALITY)}),
+                Config.MAX_DOWNLOAD_SIZE,
+                Config.MAX_DURATION,
+            )
+        except JobTooLargeError as e:
+            return jsonify({"success": False, "error": str(e)}), 413
+
+        # Each stream runs its own ffmpeg; the slot is held until the
+        # response is closed (finished or client gone)
+        holder = WorkerSlots.holder_key(f"stream-{uuid.uuid4()}")
+        if not stream_slots.try_acquire(holder):
+            return retry_later_response(
+                429,
+                "Too many streams right now, please try again shortly",
+                max(1, int(download_scheduler.stats()["avg_job_seconds"])),
+            )
+
+        try:
+            _, _, mimetype, extension = STREAM_FORMATS[codec]
+            headers = (
+                audio_format.get("http_headers") or info.get("http_headers") or {}
+            )
+            response = Response(
+                stream_audio(
+                    audio_format["url"],
+                    headers,
+                    codec,
+                    Config.AUDIO_QUALITY,
+                    Config.STREAM_CHUNK_SIZE,
+                ),
+                mimetype=mimetype,
+                headers={
+                    "Content-Disposition": f'attachment; filename="{video_id}.{extension}"',
+                    "X-Accel-Buffering": "no",
+                },
+                direct_passthrough=True,
+            )
+        except Exception:
+            stream_slots.release(holder)
+            raise
+        response.call_on_close(lambda: stream_slots.release(holder))
+        return response
+
+    except Exception as e:
+        logger.error(f"Stream error: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+def progress_snapshot(download_id):
+    """Client-facing progress record, or None if the job is unknown"""
+    progress_data = get_job(download_id)
+    if progress_data is not None:
+        # Other clients' download IDs attached to this job
+        progress_data.pop("followers", None)
+    if progress_data is not None and progress_data["status"] == "queued":
+        # Only the process that accepted the job knows its place in line
+        position = download_scheduler.position(
+            progress_data.get("leader", download_id)
+        )
+        if position:
+            progress_data["queue_position"] = position
+    return progress_data
+
+
 @app.route("/api/progress/<download_id>", methods=["GET"])
 def get_progress(download_id):
     """Get download progress endpoint"""
     try:
-        if download_id not in download_progress:
+        relayed = relay_job_request(download_id)
+        if relayed is not None:
+            return relayed
+
+        progress_data = progress_snapshot(download_id)
+        if progress_data is None:
             return jsonify({"success": False, "error": "Download not found"}), 404
 
-        progress_data = download_progress[download_id].copy()
         return jsonify({"success": True, "progress": progress_data})
 
     except Exception as e:
@@ -271,93 +2109,179 @@ def get_progress(download_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route("/api/progress/<download_id>/events", methods=["GET"])
+def progress_events(download_id):
+    """Push progress changes as Server-Sent Events until the job ends.
+
+    Only served in async mode: under sync workers each stream would hold
+    a whole worker process and be killed at the Gunicorn timeout, so
+    clients poll /api/progress instead (see "features" in /api/health).
+    """
+    if not PROGRESS_EVENTS:
+        return jsonify(
+            {
+                "success": False,
+                "error": "Progress events need SERVER_MODE=async; "
+                "poll /api/progress/<download_id> instead",
+            }
+        ), 501
+    relayed = relay_job_request(download_id)
+    if relayed is not None:
+        return relayed
+    if job_store.get(download_id) is None:
+        return jsonify({"success": False, "error": "Download not found"}), 404
+
+    def generate():
+        last_payload = None
+        last_sent = time.monotonic()
+        while True:
+            progress_data = progress_snapshot(download_id)
+            if progress_data is None:
+                yield 'event: error\ndata: {"error": "Download not found"}\n\n'
+                return
+
+            payload = json.dumps(progress_data)
+            now = time.monotonic()
+            if payload != last_payload:
+                yield f"data: {payload}\n\n"
+                last_payload = payload
+                last_sent = now
+            elif now - last_sent >= Config.SSE_KEEPALIVE_INTERVAL:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                last_sent = now
+
+            if progress_data["status"] in ("completed", "error"):
+                return
+            time.sleep(Config.SSE_POLL_INTERVAL)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def serve_audio_file(file_path, download_name):
+    """Send an audio file with Range, ETag and conditional request support.
+
+    With FILE_OFFLOAD=accel, files inside CACHE_DIR are handed to the
+    reverse proxy through X-Accel-Redirect; FILE_OFFLOAD=sendfile sets
+    X-Sendfile for any file. Either way Python never copies the bytes.
+    """
+    file_path = Path(file_path).resolve()
+    stat = file_path.stat()
+    # Cache entries are immutable once published and their mtime is the
+    # publish stamp (LRU recency lives in atime, see TranscodeCache), so
+    # inode+size+mtime identifies the content exactly, even if the entry
+    # is evicted and republished under the same name
+    etag = f"{file_path.name}-{stat.st_ino}-{stat.st_size}-{stat.st_mtime_ns}"
+    cache_root = Path(Config.CACHE_DIR).resolve()
+
+    started = time.perf_counter()
+    if Config.FILE_OFFLOAD == "accel" and file_path.is_relative_to(cache_root):
+        response = app.response_class(status=200)
+        response.headers["X-Accel-Redirect"] = (
+            Config.ACCEL_REDIRECT_PREFIX.rstrip("/")
+            + "/"
+            + file_path.relative_to(cache_root).as_posix()
+        )
+        response.headers["Content-Type"] = mimetype_for(file_path)
+        response.headers["Content-Disposition"] = (
+            f'attachment; filename="{download_name}"'
+        )
+        response.set_etag(etag)
+        response.last_modified = stat.st_mtime
+        served_bytes.inc(stat.st_size)
+        return response
+
+    response = send_file(
+        file_path,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype=mimetype_for(file_path),
+        conditional=True,  # Range, If-Range, If-None-Match, If-Modified-Since
+        etag=etag,
+        last_modified=stat.st_mtime,
+    )
+    sent = response.content_length or 0
+
+    def record_transfer():
+        # Runs once the body has been sent (or the client went away)
+        stage_seconds.observe(time.perf_counter() - started, stage="transfer")
+        served_bytes.inc(sent)
+
+    response.call_on_close(record_transfer)
+    return response
+
+
+def completed_file(download_id, job, rendition=None):
+    """(path, temp_dir) of a completed job's audio file, or None.
+
+    rendition picks one of a multi-rendition job's files by key (see
+    audio_formats.rendition_key); without it the primary file is used.
+    temp_dir is the job's own working directory when the file lives
+    there, and None for cache entries, which are shared with other jobs
+    and must outlive this one.
+    """
+    if rendition is not None:
+        entry = (job.get("renditions") or {}).get(rendition) or {}
+        file_path = Path(entry.get("file_path") or "")
+        if entry.get("status") != "completed" or not file_path.is_file():
+            return None
+        if job.get("temp_dir") and file_path.parent == Path(job["temp_dir"]):
+            return file_path, job["temp_dir"]
+        return file_path, None
+
+    if "file_path" in job:
+        file_path = Path(job["file_path"])
+        if file_path.exists():
+            return file_path, None
+
+    if "temp_dir" in job:
+        # Look for any audio file with the download_id prefix
+        files = list(Path(job["temp_dir"]).glob(f"{download_id}.*"))
+        if files:
+            return files[0], job["temp_dir"]
+    return None
+
+
 @app.route("/api/download/<download_id>", methods=["GET"])
 def download_file(download_id):
-    """Download the completed audio file"""
+    """Download the completed audio file (?rendition=mp3-320 picks one)"""
     try:
-        # First check if we have progress data
-        if download_id in download_progress:
-            progress_data = download_progress[download_id]
+        relayed = relay_job_request(download_id)
+        if relayed is not None:
+            return relayed
 
+        rendition = request.args.get("rendition")
+        # First check if we have progress data
+        progress_data = get_job(download_id)
+        if progress_data is not None:
             if progress_data["status"] != "completed":
                 return jsonify(
                     {"success": False, "error": "Download not completed yet"}
                 ), 400
 
-            # Find the downloaded file
-            if "temp_dir" in progress_data:
-                temp_dir = progress_data["temp_dir"]
-
-                # Look for any audio file with the download_id prefix
-                files = list(Path(temp_dir).glob(f"{download_id}.*"))
-
-                if files:
-                    file_path = files[0]
-
-                    # Clean up progress tracking after successful download
-                    def cleanup():
-                        time.sleep(300)  # Wait 5 minutes before cleanup
-                        try:
-                            if download_id in download_progress:
-                                del download_progress[download_id]
-                            # Clean up temp directory
-                            import shutil
-
-                            shutil.rmtree(temp_dir, ignore_errors=True)
-                        except Exception:
-                            pass
-
-                    cleanup_thread = threading.Thread(target=cleanup)
-                    cleanup_thread.daemon = True
-                    cleanup_thread.start()
-
-                    return send_file(
-                        file_path,
-                        as_attachment=True,
-                        download_name=f"{file_path.stem}.mp3",
-                        mimetype="audio/mpeg",
-                    )
-
-        # Fallback: Search all temp directories for this download_id
-        # This handles cases where Flask server restarted and lost progress data
-        temp_base = tempfile.gettempdir()
-        temp_dirs = [
-            d
-            for d in Path(temp_base).iterdir()
-            if d.is_dir() and d.name.startswith(f"yt_download_{download_id}_")
-        ]
-
-        for temp_dir in temp_dirs:
-            # Look for any audio file with the download_id prefix
-            audio_extensions = ["*.mp3", "*.m4a", "*.webm", "*.ogg", "*.wav"]
-            files = []
-            for ext in audio_extensions:
-                files.extend(list(temp_dir.glob(ext)))
-
-            if files:
-                file_path = files[0]
-
-                # Clean up temp directory after download
-                def cleanup():
-                    time.sleep(300)  # Wait 5 minutes before cleanup
-                    try:
-                        import shutil
-
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                    except Exception:
-                        pass
-
-                cleanup_thread = threading.Thread(target=cleanup)
-                cleanup_thread.daemon = True
-                cleanup_thread.start()
+            found = completed_file(download_id, progress_data, rendition)
+            if found is not None:
+                file_path, temp_dir = found
 
-                return send_file(
-                    file_path,
-                    as_attachment=True,
-                    download_name=f"{file_path.stem}.mp3",
-                    mimetype="audio/mpeg",
+                # Clean up progress tracking after successful download
+                janitor.schedule(
+                    download_id, Config.FETCH_GRACE_PERIOD, temp_dir=temp_dir
                 )
 
+                if rendition is not None:
+                    return serve_audio_file(
+                        file_path, f"{download_id}.{rendition}{file_path.suffix}"
+                    )
+                if temp_dir is None:
+                    return serve_audio_file(
+                        file_path, f"{download_id}{file_path.suffix}"
+                    )
+                return serve_audio_file(file_path, file_path.name)
+
         # If nothing found
         return jsonify(
             {"success": False, "error": "Downloaded file not found or expired"}
@@ -375,37 +2299,46 @@ def health_check():
         {
             "success": True,
             "message": "YouTube Audio Downloader API is running",
-            "active_downloads": len(download_progress),
+            "active_downloads": len(job_store),
+            "pipeline": {
+                "fetch": download_scheduler.stats(),
+                "transcode": transcode_scheduler.stats(),
+                "batch": batch_scheduler.stats(),
+            },
+            "cache": transcode_cache.stats(),
+            "video_info_cache": video_info_cache.stats(),
+            "janitor": janitor.stats(),
+            "upstream": {
+                "rate_governor": rate_governor.stats(),
+                "circuit_breaker": circuit_breaker.stats(),
+            },
+            "cluster": cluster.stats() if cluster is not None else None,
+            "features": {
+                "progress_events": PROGRESS_EVENTS,
+                "audio_streams": AUDIO_STREAMS,
+            },
         }
     )
 
 
+@app.route("/api/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus metrics for the whole server (every worker process)"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/api/cleanup", methods=["POST"])
 def cleanup_downloads():
-    """Cleanup old downloads (admin endpoint)"""
+    """Run a janitor sweep now (admin endpoint)"""
     try:
-        # Clean up completed or errored downloads older than 1 hour
-        current_time = time.time()
-        to_remove = []
-
-        for download_id, data in download_progress.items():
-            # Add timestamp if not present
-            if "timestamp" not in data:
-                data["timestamp"] = current_time
-
-            # Remove if older than 1 hour and completed/errored
-            if (current_time - data.get("timestamp", current_time)) > 3600:
-                if data["status"] in ["completed", "error"]:
-                    to_remove.append(download_id)
-
-        for download_id in to_remove:
-            del download_progress[download_id]
+        report = janitor.sweep()
 
         return jsonify(
             {
                 "success": True,
-                "cleaned_up": len(to_remove),
-                "active_downloads": len(download_progress),
+                "cleaned_up": report["jobs_removed"],
+                "bytes_reclaimed": report["bytes_reclaimed"],
+                "active_downloads": len(job_store),
             }
         )
 
@@ -414,14 +2347,43 @@ def cleanup_downloads():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+_services_started = False
+
+
+def start_background_services():
+    """Resume interrupted jobs, start the janitor and metrics flushing
+    (idempotent).
+
+    Runs at import time normally. With PRELOAD_APP the module is
+    imported once in the Gunicorn master, where threads would not
+    survive fork(), so gunicorn.conf.py calls this in each worker
+    instead (post_fork).
+    """
+    global _services_started
+    if _services_started:
+        return
+    _services_started = True
+    # Pick up jobs left behind by a previous process
+    recover_interrupted_jobs()
+    janitor.start()
+    metrics.start()
+
+
+if Config.PRELOAD_APP:
+    warm_yt_dlp()
+else:
+    start_background_services()
+
+
 if __name__ == "__main__":
     # Ensure temp directory exists
     os.makedirs("temp", exist_ok=True)
+    start_background_services()
 
     # Check if running in production
     if os.environ.get("FLASK_ENV") == "production":
         # Production: Let Gunicorn handle this
-        app.run(debug=False, host="0.0.0.0", port=5001)
+        app.run(debug=False, host="0.0.0.0", port=int(os.environ.get("PORT", 5001)))
     else:
         # Development server
-        app.run(debug=True, host="0.0.0.0", port=5001)
+        app.run(debug=True, host="0.0.0.0", port=int(os.environ.get("PORT", 5001)))
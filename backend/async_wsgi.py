@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Async (gevent) entry point for production deployment
+
+Serves the same app as wsgi.py, but with cooperative I/O: sockets and
+sleeps yield to other connections, so one process can hold thousands of
+idle progress streams and slow file transfers. Threads are left as real
+OS threads (see offload.PATCH_OPTIONS): the job pools run on them, and
+SQLite and other blocking calls made by request greenlets are handed to
+the hub's threadpool. Under Gunicorn, use the matching worker class
+gevent_worker.GeventWorker (gunicorn.conf.py selects it).
+"""
+
+import os
+import sys
+
+# Add current directory to Python path
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Must run before anything imports socket, ssl or select
+from gevent import monkey
+
+from offload import PATCH_OPTIONS
+
+monkey.patch_all(**PATCH_OPTIONS)
+
+import offload
+from config import Config
+
+offload.enable(Config.ASYNC_THREADPOOL_SIZE)
+
+from app import app
+
+if __name__ == "__main__":
+    from gevent.pywsgi import WSGIServer
+
+    WSGIServer(("0.0.0.0", 5001), app).serve_forever()
@@ -0,0 +1,180 @@
+"""
+YouTube Audio Downloader Backend Service
+Output format negotiation: pick the cheapest way to produce a requested format
+"""
+
+# Requested format -> how to get it.
+#   selector:   yt-dlp format selector, preferring sources that avoid a re-encode
+#   codec:      FFmpegExtractAudio preferredcodec ("best" copies the stream as-is)
+#   extensions: file extensions the output can end up with
+#   copy_from:  source codecs that are remuxed instead of transcoded
+#               (None means the format never transcodes)
+OUTPUT_FORMATS = {
+    "mp3": {
+        "selector": "bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best[height<=720]",
+        "codec": "mp3",
+        "extensions": ("mp3",),
+        "copy_from": ("mp3",),
+    },
+    "m4a": {
+        "selector": "bestaudio[ext=m4a]/bestaudio/best[height<=720]",
+        "codec": "m4a",
+        "extensions": ("m4a",),
+        "copy_from": ("mp4a", "aac"),
+    },
+    "opus": {
+        "selector": "bestaudio[acodec=opus]/bestaudio/best[height<=720]",
+        "codec": "opus",
+        "extensions": ("opus",),
+        "copy_from": ("opus",),
+    },
+    "native": {
+        "selector": "bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best[height<=720]",
+        "codec": "best",
+        "extensions": ("m4a", "opus", "ogg", "mp3", "flac", "wav"),
+        "copy_from": None,
+    },
+}
+
+# "remux" is accepted as another name for "native"
+FORMAT_ALIASES = {"remux": "native"}
+
+ALLOWED_BITRATES = ("96", "128", "160", "192", "256", "320")
+
+# Renditions one job may produce from a single download and decode
+MAX_RENDITIONS = 4
+
+# Source selector for jobs producing several formats: every rendition is
+# encoded from the same file, so take the best audio available
+MULTI_FORMAT_SELECTOR = "bestaudio/best[height<=720]"
+
+# Top-level fields of an extracted info dict that a later download needs
+# to re-run format selection and name its output; the rest (thumbnails,
+# captions, description, heatmap...) is not kept in the resolved cache
+RESOLVED_INFO_FIELDS = (
+    "id",
+    "title",
+    "fulltitle",
+    "display_id",
+    "duration",
+    "uploader",
+    "upload_date",
+    "timestamp",
+    "extractor",
+    "extractor_key",
+    "webpage_url",
+    "webpage_url_basename",
+    "webpage_url_domain",
+    "original_url",
+    "http_headers",
+    "live_status",
+    "is_live",
+    "was_live",
+    "_format_sort_fields",
+    "_has_drm",
+    "_type",
+    "epoch",
+)
+
+
+def slim_resolved_info(info):
+    """The part of a sanitized info dict a download can reuse.
+
+    Only formats the OUTPUT_FORMATS selectors can choose are kept:
+    audio-only streams, and the combined streams up to 720p that the
+    best[height<=720] fallback picks from.
+    """
+    formats = info.get("formats")
+    if not formats:
+        # Single-stream result: the stream fields are the top level
+        return info
+    slim = {key: info[key] for key in RESOLVED_INFO_FIELDS if key in info}
+    slim["formats"] = [
+        fmt
+        for fmt in formats
+        if fmt.get("acodec") not in (None, "none")
+        and (fmt.get("vcodec") == "none" or (fmt.get("height") or 0) <= 720)
+    ]
+    return slim
+
+
+AUDIO_MIMETYPES = {
+    "mp3": "audio/mpeg",
+    "m4a": "audio/mp4",
+    "aac": "audio/aac",
+    "opus": "audio/ogg",
+    "ogg": "audio/ogg",
+    "webm": "audio/webm",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+}
+
+
+def negotiate_output(requested_format, requested_bitrate):
+    """Resolve a client's format request into an output spec.
+
+    Raises ValueError for unknown formats or bitrates. Lossless modes
+    carry "copy" as their bitrate so they share one cache entry.
+    """
+    name = FORMAT_ALIASES.get(requested_format, requested_format)
+    if name not in OUTPUT_FORMATS:
+        supported = ", ".join(sorted(OUTPUT_FORMATS) + sorted(FORMAT_ALIASES))
+        raise ValueError(f"Unsupported format '{requested_format}' (use {supported})")
+
+    spec = OUTPUT_FORMATS[name]
+    if spec["copy_from"] is None:
+        bitrate = "copy"
+    else:
+        bitrate = str(requested_bitrate)
+        if bitrate not in ALLOWED_BITRATES:
+            raise ValueError(
+                f"Unsupported bitrate '{bitrate}' (use {', '.join(ALLOWED_BITRATES)})"
+            )
+    return dict(spec, name=name, bitrate=bitrate)
+
+
+def negotiate_renditions(requested, default_bitrate):
+    """Resolve a list of {"format", "bitrate"} requests into output specs.
+
+    Duplicates collapse into one rendition; a missing bitrate means
+    default_bitrate. Raises ValueError for an
+    empty or oversized list, or any unsupported format or bitrate.
+    """
+    if not isinstance(requested, list) or not requested:
+        raise ValueError("renditions must be a non-empty list")
+    outputs = {}
+    for item in requested:
+        if not isinstance(item, dict) or "format" not in item:
+            raise ValueError('Each rendition needs a "format"')
+        output = negotiate_output(item["format"], item.get("bitrate", default_bitrate))
+        outputs.setdefault(rendition_key(output), output)
+    if len(outputs) > MAX_RENDITIONS:
+        raise ValueError(f"At most {MAX_RENDITIONS} renditions per download")
+    return list(outputs.values())
+
+
+def rendition_key(output):
+    """Name of an output spec within a job, such as mp3-320 or native-copy"""
+    return f"{output['name']}-{output['bitrate']}"
+
+
+def source_selector(outputs):
+    """yt-dlp format selector for a job producing the given outputs"""
+    if len({output["name"] for output in outputs}) == 1:
+        return outputs[0]["selector"]
+    return MULTI_FORMAT_SELECTOR
+
+
+def processing_path(output, source_codec):
+    """'remux' if the source audio can be copied into the output, else 'transcode'"""
+    if output["copy_from"] is None:
+        return "remux"
+    source_codec = (source_codec or "").lower()
+    if any(source_codec.startswith(codec) for codec in output["copy_from"]):
+        return "remux"
+    return "transcode"
+
+
+def mimetype_for(path):
+    """Response mimetype for an audio file path"""
+    return AUDIO_MIMETYPES.get(path.suffix.lstrip(".").lower(), "application/octet-stream")
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark and load test for the backend API
+Serves generated audio from a local HTTP server in place of YouTube and
+drives the Flask endpoints at a configurable concurrency.
+
+Usage:
+    python benchmark.py --requests 200 --concurrency 20 --videos 30 \
+        --duration 180 --throttle-kbps 2000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline backend benchmark")
+    parser.add_argument("--requests", type=int, default=100, help="client sessions")
+    parser.add_argument("--concurrency", type=int, default=10, help="parallel clients")
+    parser.add_argument("--videos", type=int, default=20, help="distinct videos")
+    parser.add_argument(
+        "--duration", type=int, default=180, help="seconds of audio per video"
+    )
+    parser.add_argument(
+        "--throttle-kbps",
+        type=int,
+        default=0,
+        help="per-connection source bandwidth in KiB/s (0 = unthrottled)",
+    )
+    parser.add_argument(
+        "--skew",
+        type=float,
+        default=1.1,
+        help="Zipf exponent for video popularity (0 = uniform)",
+    )
+    parser.add_argument("--format", default="mp3", help="requested output format")
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--output", default="benchmark_results.json")
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------------------------
+# Local stand-in for YouTube
+# ---------------------------------------------------------------------------
+
+
+def generate_sources(directory, videos, duration):
+    """Create one AAC/m4a file per fake video ID with ffmpeg"""
+    sources = {}
+    for index in range(videos):
+        video_id = f"bench{index:06d}"
+        path = Path(directory) / f"{video_id}.m4a"
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-f",
+                "lavfi",
+                "-i",
+                f"sine=frequency={220 + index * 7}:duration={duration}",
+                "-c:a",
+                "aac",
+                "-b:a",
+                "128k",
+                "-y",
+                str(path),
+            ],
+            check=True,
+        )
+        sources[video_id] = path
+    return sources
+
+
+def make_source_handler(sources, throttle_kbps):
+    """HTTP handler serving source files with Range support and throttling"""
+    rate = throttle_kbps * 1024
+
+    class SourceHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            video_id = Path(self.path.split("?")[0]).stem
+            path = sources.get(video_id)
+            if path is None:
+                self.send_error(404)
+                return
+
+            size = path.stat().st_size
+            start, end = 0, size - 1
+            range_header = self.headers.get("Range")
+            if range_header and range_header.startswith("bytes="):
+                first, _, last = range_header[6:].partition("-")
+                start = int(first) if first else 0
+                end = min(int(last), size - 1) if last else size - 1
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "audio/mp4")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+
+            chunk_size = 64 * 1024
+            remaining = end - start + 1
+            with open(path, "rb") as source:
+                source.seek(start)
+                while remaining > 0:
+                    chunk = source.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    started = time.monotonic()
+                    try:
+                        self.wfile.write(chunk)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+                    remaining -= len(chunk)
+                    if rate:
+                        # Sleep off whatever the write did not already take
+                        delay = len(chunk) / rate - (time.monotonic() - started)
+                        if delay > 0:
+                            time.sleep(delay)
+
+    return SourceHandler
+
+
+def install_fake_extractor(source_base_url, sources, duration):
+    """Make yt-dlp resolve YouTube URLs to the local source server.
+
+    Only extraction is replaced; format selection, the HTTP download,
+    progress hooks and postprocessing run through yt-dlp as usual.
+    """
+    import yt_dlp
+
+    from youtube_url import extract_video_id
+
+    def extract_info(self, url, download=True, *args, **kwargs):
+        video_id = extract_video_id(url)
+        if video_id not in sources:
+            raise yt_dlp.utils.DownloadError(f"ERROR: [bench] {video_id}: Video unavailable")
+        info = {
+            "id": video_id,
+            "title": f"Benchmark track {video_id}",
+            "uploader": "benchmark",
+            "duration": duration,
+            "thumbnail": "",
+            "view_count": 0,
+            "upload_date": "20240101",
+            "webpage_url": url,
+            "extractor": "bench",
+            "extractor_key": "Bench",
+            "formats": [
+                {
+                    "format_id": "140",
+                    "url": f"{source_base_url}/{video_id}.m4a",
+                    "ext": "m4a",
+                    "acodec": "mp4a.40.2",
+                    "vcodec": "none",
+                    "abr": 128,
+                    "filesize": sources[video_id].stat().st_size,
+                    "protocol": "http",
+                }
+            ],
+        }
+        return self.process_ie_result(info, download=download)
+
+    yt_dlp.YoutubeDL.extract_info = extract_info
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def run_session(session, api_url, video_id, args, latencies, errors):
+    """One client: info -> start -> progress until done -> fetch"""
+    url = f"https://www.youtube.com/watch?v={video_id}"
+
+    def timed(op, method, path, **kwargs):
+        started = time.perf_counter()
+        response = session.request(method, f"{api_url}{path}", timeout=600, **kwargs)
+        if op == "fetch":
+            # Include the full body transfer
+            for _ in response.iter_content(256 * 1024):
+                pass
+        latencies[op].append(time.perf_counter() - started)
+        return response
+
+    try:
+        timed("info", "POST", "/video-info", json={"url": url})
+
+        response = timed(
+            "start", "POST", "/download", json={"url": url, "format": args.format}
+        )
+        if response.status_code == 429:
+            errors["rejected"] += 1
+            return
+        download_id = response.json()["download_id"]
+
+        job_started = time.perf_counter()
+        while True:
+            progress = timed("progress", "GET", f"/progress/{download_id}").json()
+            status = progress.get("progress", {}).get("status")
+            if status == "completed":
+                break
+            if status == "error" or not progress.get("success"):
+                errors["failed"] += 1
+                return
+            time.sleep(args.poll_interval)
+        latencies["job"].append(time.perf_counter() - job_started)
+
+        response = timed("fetch", "GET", f"/download/{download_id}", stream=True)
+        if response.status_code != 200:
+            errors["failed"] += 1
+    except Exception as e:
+        print(f"❌ Session error: {e}")
+        errors["failed"] += 1
+
+
+def main():
+    args = parse_args()
+    import requests
+
+    work_root = Path(tempfile.mkdtemp(prefix="ytdl_bench_"))
+    source_dir = work_root / "sources"
+    source_dir.mkdir()
+
+    print("🔧 YouTube Audio Downloader Benchmark")
+    print("=" * 50)
+    print(f"🎵 Generating {args.videos} source files ({args.duration}s each)...")
+    sources = generate_sources(source_dir, args.videos, args.duration)
+
+    source_server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_source_handler(sources, args.throttle_kbps)
+    )
+    threading.Thread(target=source_server.serve_forever, daemon=True).start()
+    source_base_url = f"http://127.0.0.1:{source_server.server_address[1]}"
+
+    # Point every backend path at the scratch directory before importing the app
+    temp_dir = work_root / "backend"
+    os.environ["TEMP_DIR"] = str(temp_dir)
+    for name in ("JOB_STORE_PATH", "CACHE_DIR", "WORK_DIR"):
+        os.environ.pop(name, None)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    install_fake_extractor(source_base_url, sources, args.duration)
+
+    from werkzeug.serving import make_server
+
+    from app import app
+
+    api_server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=api_server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{api_server.server_port}/api"
+
+    # Popularity follows a Zipf-like distribution so caching and
+    # deduplication are exercised the way real traffic would
+    video_ids = sorted(sources)
+    weights = [1 / (rank + 1) ** args.skew for rank in range(len(video_ids))]
+    plan = random.Random(42).choices(video_ids, weights=weights, k=args.requests)
+
+    latencies = {op: [] for op in ("info", "start", "progress", "job", "fetch")}
+    errors = {"failed": 0, "rejected": 0}
+    peak_disk = 0
+    stop = threading.Event()
+
+    def sample_disk():
+        nonlocal peak_disk
+        while not stop.is_set():
+            peak_disk = max(peak_disk, directory_size(temp_dir))
+            time.sleep(0.5)
+
+    threading.Thread(target=sample_disk, daemon=True).start()
+
+    print(
+        f"🚀 Running {args.requests} sessions at concurrency {args.concurrency}..."
+    )
+    usage_before = (
+        resource.getrusage(resource.RUSAGE_SELF),
+        resource.getrusage(resource.RUSAGE_CHILDREN),
+    )
+    started = time.perf_counter()
+    sessions = [requests.Session() for _ in range(args.concurrency)]
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for index, video_id in enumerate(plan):
+            pool.submit(
+                run_session,
+                sessions[index % args.concurrency],
+                api_url,
+                video_id,
+                args,
+                latencies,
+                errors,
+            )
+    elapsed = time.perf_counter() - started
+    stop.set()
+
+    usage_after = (
+        resource.getrusage(resource.RUSAGE_SELF),
+        resource.getrusage(resource.RUSAGE_CHILDREN),
+    )
+    cpu_seconds = sum(
+        (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+        for before, after in zip(usage_before, usage_after)
+    )
+    completed = len(latencies["fetch"])
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": vars(args),
+        "elapsed_seconds": elapsed,
+        "completed_sessions": completed,
+        "failed_sessions": errors["failed"],
+        "rejected_sessions": errors["rejected"],
+        "throughput_per_second": completed / elapsed if elapsed else 0,
+        "latency_seconds": {op: summarize(values) for op, values in latencies.items()},
+        "cpu_seconds_per_job": cpu_seconds / completed if completed else None,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "peak_disk_bytes": peak_disk,
+    }
+
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+
+    print("-" * 30)
+    print(f"✅ {completed} completed, {errors['failed']} failed, {errors['rejected']} rejected")
+    print(f"📈 Throughput: {results['throughput_per_second']:.2f} sessions/s")
+    for op, summary in results["latency_seconds"].items():
+        if summary["count"]:
+            print(
+                f"⏱️  {op:<8} p50={summary['p50']:.3f}s "
+                f"p95={summary['p95']:.3f}s p99={summary['p99']:.3f}s"
+            )
+    print(f"💾 Results written to {args.output}")
+
+    api_server.shutdown()
+    source_server.shutdown()
+    shutil.rmtree(work_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+YouTube Audio Downloader Backend Service
+Circuit breaker that stops upstream work while YouTube is blocking us
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of contacting upstream while the circuit is open"""
+
+    def __init__(self, retry_after):
+        super().__init__("Upstream is blocking requests; circuit open")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over upstream block errors.
+
+    failure_threshold consecutive block errors (403, 429, bot checks)
+    open the circuit, and work is refused for reset_timeout seconds.
+    After that a single caller is let through as a probe: its first
+    successful upstream request closes the circuit, a block error
+    re-opens it. Everyone else is still refused while the probe is in
+    flight. A probe that never reports back (its worker died) is
+    replaced after another reset_timeout. State is shared by all workers.
+    """
+
+    def __init__(self, state, failure_threshold, reset_timeout):
+        self.state = state
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+
+    def allow(self):
+        """Claim permission to contact upstream.
+
+        Returns normally if the circuit is closed or this caller becomes
+        the half-open probe; raises CircuitOpenError otherwise.
+        """
+
+        def check(circuit):
+            now = time.time()
+            if circuit["state"] == CLOSED:
+                return 0
+            if circuit["state"] == HALF_OPEN:
+                waited = now - circuit["probe_started"]
+            else:
+                waited = now - circuit["opened_at"]
+            if waited < self.reset_timeout:
+                return self.reset_timeout - waited
+            circuit["state"] = HALF_OPEN
+            circuit["probe_started"] = now
+            circuit["probe"] = self._holder()
+            return 0
+
+        retry_after = self._transact(check)
+        if retry_after:
+            raise CircuitOpenError(max(1, int(retry_after)))
+
+    def retry_after(self):
+        """Seconds until upstream work is allowed again, or 0 if it is now.
+
+        Non-zero while the circuit is open, and while another caller's
+        half-open probe is in flight; 0 for the probe itself. Unlike
+        allow() this never claims the probe, so it suits quick checks
+        such as rejecting new jobs or aborting in-flight retries.
+        """
+
+        def peek(circuit):
+            if circuit["state"] == OPEN:
+                started = circuit["opened_at"]
+            elif circuit["state"] == HALF_OPEN and (
+                circuit.get("probe") != self._holder()
+            ):
+                started = circuit["probe_started"]
+            else:
+                return 0
+            return max(0, started + self.reset_timeout - time.time())
+
+        remaining = peek(self._read())
+        return max(1, int(remaining)) if remaining else 0
+
+    def record_probe_success(self):
+        """Close the circuit if the calling thread is the half-open probe.
+
+        Called after each successful upstream request, so the probe
+        closes the circuit on its first answer instead of after its
+        whole download. Only reads the state unless it is the probe.
+        """
+        circuit = self._read()
+        if circuit["state"] == HALF_OPEN and circuit.get("probe") == self._holder():
+            self.record_success()
+
+    def record_success(self):
+        """Upstream answered (including errors that are not blocks)"""
+
+        def reset(circuit):
+            previous = circuit["state"]
+            circuit["state"] = CLOSED
+            circuit["failures"] = 0
+            circuit["probe"] = None
+            return previous
+
+        if self._transact(reset) != CLOSED:
+            logger.info("Upstream recovered, circuit closed")
+
+    def record_failure(self):
+        """Upstream refused us (403, 429 or a bot check)"""
+
+        def trip(circuit):
+            circuit["failures"] += 1
+            if circuit["state"] == HALF_OPEN or (
+                circuit["state"] == CLOSED
+                and circuit["failures"] >= self.failure_threshold
+            ):
+                circuit["state"] = OPEN
+                circuit["opened_at"] = time.time()
+                circuit["probe"] = None
+                circuit["trips"] += 1
+                return True
+            return False
+
+        if self._transact(trip):
+            logger.warning(
+                f"Upstream blocking requests, circuit open for {self.reset_timeout:.0f}s"
+            )
+
+    def stats(self):
+        circuit = self._read()
+        return {
+            "state": circuit["state"],
+            "consecutive_failures": circuit["failures"],
+            "trips": circuit["trips"],
+            "retry_after": self.retry_after(),
+        }
+
+    @staticmethod
+    def _initial_circuit():
+        return {
+            "state": CLOSED,
+            "failures": 0,
+            "opened_at": 0.0,
+            "probe_started": 0.0,
+            "probe": None,
+            "trips": 0,
+        }
+
+    @staticmethod
+    def _holder():
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    def _transact(self, func):
+        return self.state.transact("circuit_breaker", self._initial_circuit, func)
+
+    def _read(self):
+        """Current circuit without taking the write lock"""
+        return self.state.read("circuit_breaker", self._initial_circuit)
@@ -0,0 +1,142 @@
+"""
+YouTube Audio Downloader Backend Service
+Cluster mode: route each video to the node that owns it on a hash ring
+"""
+
+import logging
+import threading
+import time
+
+import requests
+
+from hash_ring import HashRing
+
+logger = logging.getLogger(__name__)
+
+# Set on forwarded requests; the receiving node always handles them itself,
+# so nodes with briefly different peer views cannot bounce a request around
+FORWARDED_HEADER = "X-Cluster-Forwarded-By"
+
+# Request headers passed on to the owner (conditional and range requests)
+FORWARDED_REQUEST_HEADERS = (
+    "Content-Type",
+    "Range",
+    "If-Range",
+    "If-None-Match",
+    "If-Modified-Since",
+    "Accept",
+)
+
+# Response headers relayed back to the client
+RELAYED_RESPONSE_HEADERS = (
+    "Content-Type",
+    "Content-Length",
+    "Content-Disposition",
+    "Content-Range",
+    "Accept-Ranges",
+    "ETag",
+    "Last-Modified",
+    "Cache-Control",
+    "Retry-After",
+    "X-Accel-Buffering",
+)
+
+
+class PeerUnavailable(Exception):
+    """Raised when a peer cannot be reached"""
+
+
+class Cluster:
+    """This node's view of the cluster.
+
+    Every node is configured with the same peer list, so every node
+    computes the same owner for a video ID and that video's downloads,
+    metadata and cache entries all live on one node. A peer that fails
+    a request leaves the ring for cooldown seconds: only its share of
+    videos moves, to the next node on the ring, and moves back when it
+    returns.
+    """
+
+    def __init__(self, self_url, peers, vnodes=128, timeout=30, cooldown=30):
+        self.self_url = self_url.rstrip("/")
+        self.peers = {peer.rstrip("/") for peer in peers} | {self.self_url}
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.ring = HashRing(self.peers, vnodes)
+        self._down = {}  # peer -> monotonic time it may rejoin
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self.forwarded = 0
+        self.failures = 0
+
+    def owner(self, key):
+        """Peer URL that owns key, or None when it is this node"""
+        with self._lock:
+            now = time.monotonic()
+            for peer, until in list(self._down.items()):
+                if now >= until:
+                    del self._down[peer]
+                    self.ring.add(peer)
+                    logger.info(f"Peer {peer} rejoined the ring")
+            owner = self.ring.owner(key)
+        return None if owner in (None, self.self_url) else owner
+
+    def mark_down(self, peer):
+        """Route around a failing peer until its cooldown expires"""
+        with self._lock:
+            self.failures += 1
+            if peer in self._down:
+                return
+            self._down[peer] = time.monotonic() + self.cooldown
+            self.ring.remove(peer)
+        logger.warning(
+            f"Peer {peer} unavailable, routing around it for {self.cooldown}s"
+        )
+
+    def forward(self, peer, method, path, headers=None, **kwargs):
+        """Send a request to a peer and return the streamed response.
+
+        Raises PeerUnavailable (after taking the peer out of the ring)
+        if it cannot be reached.
+        """
+        headers = {
+            **(headers or {}),
+            FORWARDED_HEADER: self.self_url,
+            # Relayed bodies are passed through byte for byte
+            "Accept-Encoding": "identity",
+        }
+        try:
+            response = self._session.request(
+                method,
+                peer + path,
+                headers=headers,
+                timeout=self.timeout,
+                stream=True,
+                **kwargs,
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self.mark_down(peer)
+            raise PeerUnavailable(f"Peer {peer} unavailable: {str(e)}") from e
+        with self._lock:
+            self.forwarded += 1
+        return response
+
+    def stats(self):
+        """Snapshot of cluster membership for health checks"""
+        with self._lock:
+            return {
+                "self": self.self_url,
+                "peers": sorted(self.peers),
+                "down": sorted(self._down),
+                "vnodes": self.ring.vnodes,
+                "forwarded": self.forwarded,
+                "failures": self.failures,
+            }
+
+
+def create_cluster(self_url, peers, vnodes, timeout, cooldown):
+    """Cluster for CLUSTER_SELF/CLUSTER_PEERS, or None outside cluster mode"""
+    peers = [peer.strip() for peer in peers if peer.strip()]
+    if not self_url or not peers:
+        return None
+    return Cluster(self_url, peers, vnodes, timeout, cooldown)
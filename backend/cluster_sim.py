@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Cluster routing simulation
+Measures how the consistent-hash ring (hash_ring.py) spreads video IDs,
+how many move when a node joins or leaves, and the aggregate cache hit
+rate of N nodes with and without routing by video ID.
+
+Usage:
+    python cluster_sim.py --nodes 1 2 4 8 --cache-entries 500
+"""
+
+import argparse
+import bisect
+import itertools
+import random
+from collections import OrderedDict
+
+from hash_ring import HashRing
+
+
+def node_names(count):
+    return [f"http://127.0.0.1:{5001 + index}" for index in range(count)]
+
+
+def rebalance_report(node_count, vnodes, keys):
+    """Share of keys each node owns, and the share moved by a join/leave"""
+    nodes = node_names(node_count)
+    ring = HashRing(nodes, vnodes)
+    before = {key: ring.owner(key) for key in keys}
+
+    counts = {}
+    for owner in before.values():
+        counts[owner] = counts.get(owner, 0) + 1
+    mean = len(keys) / node_count
+
+    ring.add(node_names(node_count + 1)[-1])
+    joined = sum(1 for key in keys if ring.owner(key) != before[key]) / len(keys)
+
+    ring = HashRing(nodes, vnodes)
+    ring.remove(nodes[0])
+    left = sum(1 for key in keys if ring.owner(key) != before[key]) / len(keys)
+
+    return {
+        "max_load": max(counts.values()) / mean,
+        "moved_on_join": joined,
+        "ideal_join": 1 / (node_count + 1),
+        "moved_on_leave": left,
+        "ideal_leave": 1 / node_count,
+    }
+
+
+def hit_rate(node_count, routed, requests, cache_entries, vnodes):
+    """Aggregate hit rate of per-node LRU caches of cache_entries videos"""
+    nodes = node_names(node_count)
+    ring = HashRing(nodes, vnodes)
+    caches = {node: OrderedDict() for node in nodes}
+    pick = random.Random(7)
+    hits = 0
+    for video_id in requests:
+        node = ring.owner(video_id) if routed else pick.choice(nodes)
+        cache = caches[node]
+        if video_id in cache:
+            cache.move_to_end(video_id)
+            hits += 1
+        else:
+            cache[video_id] = True
+            if len(cache) > cache_entries:
+                cache.popitem(last=False)
+    return hits / len(requests)
+
+
+def zipf_requests(catalog, count, exponent, seed=1):
+    """Video IDs drawn with Zipf popularity, as real request mixes are"""
+    weights = [1 / rank**exponent for rank in range(1, catalog + 1)]
+    cumulative = list(itertools.accumulate(weights))
+    rng = random.Random(seed)
+    return [
+        f"video{bisect.bisect(cumulative, rng.random() * cumulative[-1]):06d}"
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster routing simulation")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--vnodes", type=int, default=128)
+    parser.add_argument("--catalog", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--zipf", type=float, default=0.9)
+    parser.add_argument("--cache-entries", type=int, default=500)
+    args = parser.parse_args()
+
+    print("🔧 Cluster Routing Simulation")
+    print("=" * 50)
+
+    keys = [f"video{index:06d}" for index in range(args.catalog)]
+    print(f"📊 Rebalancing ({args.vnodes} virtual nodes per node):")
+    for count in args.nodes:
+        report = rebalance_report(count, args.vnodes, keys)
+        print(
+            f"   {count} node(s): max load {report['max_load']:.2f}x mean, "
+            f"join moves {report['moved_on_join']:.1%} "
+            f"(ideal {report['ideal_join']:.1%}), "
+            f"leave moves {report['moved_on_leave']:.1%} "
+            f"(ideal {report['ideal_leave']:.1%})"
+        )
+
+    requests = zipf_requests(args.catalog, args.requests, args.zipf)
+    print("-" * 30)
+    print(f"📊 Aggregate cache hit rate ({args.cache_entries} videos per node):")
+    for count in args.nodes:
+        independent = hit_rate(count, False, requests, args.cache_entries, args.vnodes)
+        routed = hit_rate(count, True, requests, args.cache_entries, args.vnodes)
+        print(
+            f"   {count} node(s): independent {independent:.1%}, "
+            f"routed by video ID {routed:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,34 +17,159 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY") or "dev-secret-key-change-in-production"
     DEBUG = os.environ.get("FLASK_DEBUG", "False").lower() == "true"
 
+    # Server mode: "sync" (one request per Gunicorn worker) or "async"
+    # (gevent workers via async_wsgi.py)
+    SERVER_MODE = os.environ.get("SERVER_MODE", "sync")
+    ASYNC_WORKER_CONNECTIONS = int(os.environ.get("ASYNC_WORKER_CONNECTIONS", 1000))
+    # OS threads per async worker for blocking calls made by requests
+    # (SQLite, metadata extraction, ffmpeg pipe reads)
+    ASYNC_THREADPOOL_SIZE = int(os.environ.get("ASYNC_THREADPOOL_SIZE", 20))
+    # Import the app and yt-dlp once in the Gunicorn master so workers share
+    # the memory copy-on-write and start instantly; otherwise each worker
+    # imports yt-dlp lazily on its first job
+    PRELOAD_APP = os.environ.get("PRELOAD_APP", "False").lower() == "true"
+
     # Download settings
     MAX_DOWNLOAD_SIZE = int(
         os.environ.get("MAX_DOWNLOAD_SIZE", 100 * 1024 * 1024)
     )  # 100MB
+    # Longest video accepted; both limits are checked against metadata
+    # estimates before a job is queued
+    MAX_DURATION = int(os.environ.get("MAX_DURATION", 3 * 60 * 60))  # 3 hours
     TEMP_DIR = os.environ.get("TEMP_DIR", "temp")
     CLEANUP_INTERVAL = int(os.environ.get("CLEANUP_INTERVAL", 3600))  # 1 hour
 
-    # Rate limiting
-    MAX_CONCURRENT_DOWNLOADS = int(os.environ.get("MAX_CONCURRENT_DOWNLOADS", 5))
+    # Janitor: how long a fetched job stays available, how often to sweep,
+    # and the free disk floor below which it reclaims space early
+    FETCH_GRACE_PERIOD = int(os.environ.get("FETCH_GRACE_PERIOD", 300))  # 5 minutes
+    JANITOR_SWEEP_INTERVAL = int(os.environ.get("JANITOR_SWEEP_INTERVAL", 60))
+    MIN_FREE_DISK_BYTES = int(
+        os.environ.get("MIN_FREE_DISK_BYTES", 1024 * 1024 * 1024)
+    )  # 1GB
 
-    # CORS settings
-    CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "http://localhost:5173").split(",")
+    # Per-job working directories (partial downloads are resumed from here)
+    WORK_DIR = os.environ.get("WORK_DIR", os.path.join(TEMP_DIR, "work"))
 
+    # Job state: "sqlite" is shared by all Gunicorn workers, "memory" is per process
+    JOB_STORE = os.environ.get("JOB_STORE", "sqlite")
+    JOB_STORE_PATH = os.environ.get(
+        "JOB_STORE_PATH", os.path.join(TEMP_DIR, "jobs.db")
+    )
 
-def validate_youtube_url(url):
-    """Validate if URL is a valid YouTube URL"""
-    import re
+    # Progress publishing: ProgressHook writes at most this often unless
+    # progress moved by PROGRESS_MIN_STEP points; SSE streams re-check the
+    # store every SSE_POLL_INTERVAL seconds
+    PROGRESS_MIN_INTERVAL = float(os.environ.get("PROGRESS_MIN_INTERVAL", 0.5))
+    PROGRESS_MIN_STEP = float(os.environ.get("PROGRESS_MIN_STEP", 1.0))
+    SSE_POLL_INTERVAL = float(os.environ.get("SSE_POLL_INTERVAL", 0.5))
+    SSE_KEEPALIVE_INTERVAL = int(os.environ.get("SSE_KEEPALIVE_INTERVAL", 15))
+
+    # Video metadata cache, shared by all workers (stored like JOB_STORE)
+    VIDEO_INFO_CACHE_SIZE = int(os.environ.get("VIDEO_INFO_CACHE_SIZE", 1024))
+    VIDEO_INFO_TTL = int(os.environ.get("VIDEO_INFO_TTL", 3600))  # 1 hour
+    VIDEO_INFO_NEGATIVE_TTL = int(
+        os.environ.get("VIDEO_INFO_NEGATIVE_TTL", 300)
+    )  # 5 minutes
+    # How long resolved stream URLs from /api/video-info are reused for
+    # downloads, and how many videos' resolved formats are kept (all workers)
+    RESOLVED_INFO_TTL = int(os.environ.get("RESOLVED_INFO_TTL", 600))  # 10 minutes
+    RESOLVED_INFO_CACHE_SIZE = int(os.environ.get("RESOLVED_INFO_CACHE_SIZE", 128))
+
+    # Default output format when a request does not ask for one:
+    # mp3, m4a, opus (re-encoded only if the source differs) or native (stream copy)
+    AUDIO_CODEC = os.environ.get("AUDIO_CODEC", "mp3")
+    AUDIO_QUALITY = os.environ.get("AUDIO_QUALITY", "192")  # kbps
+
+    # Bytes read from ffmpeg per chunk by /api/stream
+    STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 64 * 1024))
+
+    # Opt-in accelerated fetch: download the source stream as parallel
+    # byte ranges over pooled keep-alive connections (falls back to a
+    # single stream when the server does not support ranges)
+    PARALLEL_FETCH = os.environ.get("PARALLEL_FETCH", "False").lower() == "true"
+    PARALLEL_FETCH_CHUNK_SIZE = int(
+        os.environ.get("PARALLEL_FETCH_CHUNK_SIZE", 10 * 1024 * 1024)
+    )  # 10MB
+    PARALLEL_FETCH_CONNECTIONS = int(os.environ.get("PARALLEL_FETCH_CONNECTIONS", 4))
+    PARALLEL_FETCH_RETRIES = int(os.environ.get("PARALLEL_FETCH_RETRIES", 3))
 
-    youtube_patterns = [
-        r"(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/|youtube\.com\/v\/|youtube\.com\/shorts\/)([^&\n?#]+)",
-        r"youtube\.com\/watch\?.*v=([^&\n?#]+)",
-        r"m\.youtube\.com\/watch\?.*v=([^&\n?#]+)",
-    ]
+    # Transcode cache
+    CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(TEMP_DIR, "cache"))
+    CACHE_MAX_BYTES = int(
+        os.environ.get("CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024)
+    )  # 2GB
 
-    for pattern in youtube_patterns:
-        if re.search(pattern, url):
-            return True
-    return False
+    # File serving offload: "none" streams from Python, "sendfile" sets
+    # X-Sendfile (Apache/lighttpd), "accel" sets X-Accel-Redirect (nginx)
+    FILE_OFFLOAD = os.environ.get("FILE_OFFLOAD", "none")
+    ACCEL_REDIRECT_PREFIX = os.environ.get("ACCEL_REDIRECT_PREFIX", "/protected-audio/")
+
+    # Concurrent requests for the same video share one job; claims older
+    # than this are considered abandoned (e.g. the worker process died)
+    INFLIGHT_TTL = int(os.environ.get("INFLIGHT_TTL", 3600))  # 1 hour
+
+    # Rate limiting. The fetch and ffmpeg limits hold for the whole host,
+    # not per Gunicorn worker (slots are shared through JOB_STORE)
+    MAX_CONCURRENT_DOWNLOADS = int(os.environ.get("MAX_CONCURRENT_DOWNLOADS", 5))
+    MAX_QUEUED_DOWNLOADS = int(os.environ.get("MAX_QUEUED_DOWNLOADS", 50))
+    # Batches: coordinators running at once, items per batch, and items
+    # of one batch downloading at the same time
+    BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 4))
+    BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 100))
+    BATCH_PARALLELISM = int(os.environ.get("BATCH_PARALLELISM", 3))
+    # Queue order for the fetch and transcode pools: "sjf" runs the job
+    # with the shortest estimated media duration first, raising a job's
+    # priority by SCHEDULER_AGING seconds of media for every second it
+    # waits; "fifo" runs jobs in arrival order. Jobs of unknown length
+    # count as SCHEDULER_DEFAULT_COST seconds.
+    JOB_SCHEDULING = os.environ.get("JOB_SCHEDULING", "sjf")
+    SCHEDULER_AGING = float(os.environ.get("SCHEDULER_AGING", 10))
+    SCHEDULER_DEFAULT_COST = float(os.environ.get("SCHEDULER_DEFAULT_COST", 600))
+    # ffmpeg stage: one process per core, with a bounded handoff queue
+    TRANSCODE_WORKERS = int(os.environ.get("TRANSCODE_WORKERS", os.cpu_count() or 1))
+    TRANSCODE_QUEUE_SIZE = int(
+        os.environ.get("TRANSCODE_QUEUE_SIZE", 2 * (os.cpu_count() or 1))
+    )
+    # /api/stream runs an ffmpeg process per response, outside the pools;
+    # at most this many at once on the host
+    MAX_CONCURRENT_STREAMS = int(
+        os.environ.get("MAX_CONCURRENT_STREAMS", os.cpu_count() or 1)
+    )
+
+    # Each worker adds its counters and histograms to the shared metrics
+    # totals (in JOB_STORE) this often, and whenever it serves a scrape
+    METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+
+    # Upstream request governor: a token bucket shared by all workers (via
+    # JOB_STORE) that runs at UPSTREAM_MAX_RATE requests/s while YouTube is
+    # healthy, multiplies the rate by UPSTREAM_BACKOFF_FACTOR on 403/429
+    # (at most once per UPSTREAM_BACKOFF_COOLDOWN seconds) and regains
+    # UPSTREAM_RATE_RECOVERY requests/s every second afterwards
+    UPSTREAM_MAX_RATE = float(os.environ.get("UPSTREAM_MAX_RATE", 10))
+    UPSTREAM_MIN_RATE = float(os.environ.get("UPSTREAM_MIN_RATE", 0.2))
+    UPSTREAM_BURST = float(os.environ.get("UPSTREAM_BURST", 10))
+    UPSTREAM_RATE_RECOVERY = float(os.environ.get("UPSTREAM_RATE_RECOVERY", 0.1))
+    UPSTREAM_BACKOFF_FACTOR = float(os.environ.get("UPSTREAM_BACKOFF_FACTOR", 0.5))
+    UPSTREAM_BACKOFF_COOLDOWN = float(os.environ.get("UPSTREAM_BACKOFF_COOLDOWN", 5))
+    # Circuit breaker: this many consecutive block errors (403/429/bot
+    # checks) stop new upstream work for CIRCUIT_RESET_TIMEOUT seconds,
+    # after which one job probes whether YouTube has recovered
+    CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", 5))
+    CIRCUIT_RESET_TIMEOUT = int(os.environ.get("CIRCUIT_RESET_TIMEOUT", 120))
+
+    # Cluster mode: every node lists the same CLUSTER_PEERS (base URLs such
+    # as http://10.0.0.2:5001) and its own CLUSTER_SELF. Each video ID is
+    # owned by one node on a consistent-hash ring of CLUSTER_VNODES points
+    # per node, and other nodes forward requests for it there. A peer that
+    # fails a request is routed around for CLUSTER_PEER_COOLDOWN seconds.
+    CLUSTER_SELF = os.environ.get("CLUSTER_SELF", "")
+    CLUSTER_PEERS = os.environ.get("CLUSTER_PEERS", "").split(",")
+    CLUSTER_VNODES = int(os.environ.get("CLUSTER_VNODES", 128))
+    CLUSTER_TIMEOUT = int(os.environ.get("CLUSTER_TIMEOUT", 30))
+    CLUSTER_PEER_COOLDOWN = int(os.environ.get("CLUSTER_PEER_COOLDOWN", 30))
+
+    # CORS settings
+    CORS_ORIGINS = os.environ.get("CORS_ORIGINS", "http://localhost:5173").split(",")
 
 
 def sanitize_filename(filename):
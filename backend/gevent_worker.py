@@ -0,0 +1,22 @@
+"""
+YouTube Audio Downloader Backend Service
+Gunicorn gevent worker that keeps real OS threads and subprocesses
+"""
+
+from gevent import monkey, socket
+from gunicorn.workers.ggevent import GeventWorker as BaseGeventWorker
+
+from offload import PATCH_OPTIONS
+
+
+class GeventWorker(BaseGeventWorker):
+    """gunicorn's gevent worker, patching with PATCH_OPTIONS"""
+
+    def patch(self):
+        monkey.patch_all(**PATCH_OPTIONS)
+
+        # As in the base class: serve the listeners through gevent sockets
+        self.sockets = [
+            socket.socket(s.FAMILY, socket.SOCK_STREAM, fileno=s.sock.fileno())
+            for s in self.sockets
+        ]
@@ -1,14 +1,29 @@
 # Gunicorn configuration file
+import gc
 import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from config import Config
 
 # Server socket
 bind = "0.0.0.0:5001"
 backlog = 2048
 
 # Worker processes
-workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
-worker_connections = 1000
+# SERVER_MODE=sync: one request per worker process; long transfers are
+# killed after `timeout`. SERVER_MODE=async: gevent workers, each holding
+# up to worker_connections concurrent connections (run async_wsgi:app).
+# The worker class is gevent's, but keeps OS threads for the job pools.
+if Config.SERVER_MODE == "async":
+    workers = multiprocessing.cpu_count() + 1
+    worker_class = "gevent_worker.GeventWorker"
+else:
+    workers = multiprocessing.cpu_count() * 2 + 1
+    worker_class = "sync"
+worker_connections = Config.ASYNC_WORKER_CONNECTIONS
 timeout = 120
 keepalive = 2
 
@@ -16,6 +31,24 @@ keepalive = 2
 max_requests = 1000
 max_requests_jitter = 50
 
+# PRELOAD_APP=true: import the app (and warm yt-dlp) once in the master;
+# workers, including recycled ones, fork with it already loaded
+preload_app = Config.PRELOAD_APP
+
+
+def when_ready(server):
+    if preload_app:
+        # Keep the garbage collector from touching (and so copying) the
+        # preloaded objects in every worker
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app import start_background_services
+
+        start_background_services()
+
 # Logging
 accesslog = "/var/log/gunicorn/access.log"
 errorlog = "/var/log/gunicorn/error.log"
@@ -0,0 +1,58 @@
+"""
+YouTube Audio Downloader Backend Service
+Consistent hashing of video IDs onto cluster nodes
+"""
+
+import bisect
+import hashlib
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes.
+
+    Each node is hashed onto a 64-bit ring at vnodes points, and a key
+    belongs to the node at the first point clockwise from the key's own
+    hash. Adding or removing a node only moves the keys on the arcs its
+    points cover (about 1/N of them); the virtual nodes keep those arcs
+    evenly spread.
+    """
+
+    def __init__(self, nodes=(), vnodes=128):
+        self.vnodes = max(1, int(vnodes))
+        self._points = []  # sorted ring positions
+        self._owners = {}  # ring position -> node
+        self.nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value):
+        digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def add(self, node):
+        """Place a node on the ring (idempotent)"""
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for index in range(self.vnodes):
+            point = self._hash(f"{node}#{index}")
+            # On the (unlikely) collision the earlier node keeps the point
+            if point not in self._owners:
+                self._owners[point] = node
+                bisect.insort(self._points, point)
+
+    def remove(self, node):
+        """Take a node off the ring; its keys move to the next points"""
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        self._points = [point for point in self._points if self._owners[point] != node]
+        self._owners = {point: self._owners[point] for point in self._points}
+
+    def owner(self, key):
+        """Node responsible for key, or None if the ring is empty"""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
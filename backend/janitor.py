@@ -0,0 +1,206 @@
+"""
+YouTube Audio Downloader Backend Service
+Background janitor: expires job state and reclaims disk space
+"""
+
+import heapq
+import logging
+import shutil
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# "forwarded" records only point at a job running on a cluster peer
+FINISHED_STATUSES = ("completed", "error", "forwarded")
+
+
+class Janitor:
+    """One background thread that removes expired jobs and their files.
+
+    Fetched jobs are scheduled for removal on a min-heap of expiry
+    times. A periodic sweep also removes finished jobs nobody fetched,
+    jobs coalesced onto a leader whose record is gone, orphaned working
+    directories, and, when free disk drops below the configured floor,
+    expires pending jobs early and shrinks the cache.
+    """
+
+    def __init__(
+        self, job_store, cache, work_dir, retention, min_free_bytes, sweep_interval
+    ):
+        self.job_store = job_store
+        self.cache = cache
+        self.work_dir = Path(work_dir)
+        self.retention = retention
+        self.min_free_bytes = min_free_bytes
+        self.sweep_interval = sweep_interval
+        self._heap = []  # (expires_at, job_id)
+        self._deadlines = {}  # job_id -> (expires_at, temp_dir), latest wins
+        self._cond = threading.Condition()
+        self._thread = None
+        self._last_sweep = time.monotonic()
+        self.jobs_removed = 0
+        self.bytes_reclaimed = 0
+
+    def start(self):
+        """Start the janitor thread (idempotent)"""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="janitor", daemon=True
+                )
+                self._thread.start()
+
+    def schedule(self, job_id, delay, temp_dir=None):
+        """Remove a job (and its working directory) after delay seconds"""
+        self.start()
+        expires_at = time.monotonic() + delay
+        with self._cond:
+            self._deadlines[job_id] = (expires_at, temp_dir)
+            heapq.heappush(self._heap, (expires_at, job_id))
+            self._cond.notify()
+
+    def sweep(self):
+        """Run a full cleanup pass now; returns what was reclaimed"""
+        now = time.time()
+        report = {"jobs_removed": 0, "bytes_reclaimed": 0}
+
+        active_dirs = set()
+        jobs = self.job_store.items()
+        job_ids = {job_id for job_id, _ in jobs}
+        for job_id, job in jobs:
+            finished_at = job.get("finished_at")
+            if (
+                "leader" in job
+                and job.get("status") not in FINISHED_STATUSES
+                and job["leader"] not in job_ids
+                and now - job.get("queued_at", 0) > self.retention
+            ):
+                # A follower never read after its leader expired
+                self._remove(job_id, None, report)
+                continue
+            if job.get("status") in FINISHED_STATUSES and finished_at is None:
+                # Start the retention clock for jobs finished without a stamp
+                self.job_store.update(job_id, finished_at=now)
+            elif (
+                job.get("status") in FINISHED_STATUSES
+                and now - finished_at > self.retention
+            ):
+                self._remove(job_id, job.get("temp_dir"), report)
+                continue
+            if job.get("temp_dir"):
+                active_dirs.add(Path(job["temp_dir"]).resolve())
+
+        # Working directories whose job record is gone
+        if self.work_dir.is_dir():
+            for path in self.work_dir.iterdir():
+                if path.resolve() in active_dirs:
+                    continue
+                try:
+                    age = now - path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if age > self.retention:
+                    report["bytes_reclaimed"] += _remove_path(path)
+
+        report["bytes_reclaimed"] += self.cache.evict()
+        report["bytes_reclaimed"] += self._relieve_disk_pressure()
+
+        self.bytes_reclaimed += report["bytes_reclaimed"]
+        self._last_sweep = time.monotonic()
+        if report["jobs_removed"] or report["bytes_reclaimed"]:
+            logger.info(
+                f"Janitor removed {report['jobs_removed']} job(s), "
+                f"reclaimed {report['bytes_reclaimed']} bytes"
+            )
+        return report
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._deadlines)
+        return {
+            "pending_expiries": pending,
+            "jobs_removed": self.jobs_removed,
+            "bytes_reclaimed": self.bytes_reclaimed,
+        }
+
+    def _free_bytes(self):
+        try:
+            return shutil.disk_usage(self.cache.root).free
+        except FileNotFoundError:
+            return self.min_free_bytes
+
+    def _relieve_disk_pressure(self):
+        """Expire scheduled jobs early and shrink the cache if disk is low"""
+        deficit = self.min_free_bytes - self._free_bytes()
+        if deficit <= 0:
+            return 0
+
+        logger.warning(f"Low disk space, reclaiming {deficit} bytes early")
+        report = {"jobs_removed": 0, "bytes_reclaimed": 0}
+        with self._cond:
+            due = list(self._deadlines.items())
+            self._deadlines.clear()
+            self._heap.clear()
+        for job_id, (_, temp_dir) in due:
+            self._remove(job_id, temp_dir, report)
+
+        deficit -= report["bytes_reclaimed"]
+        if deficit > 0:
+            target = max(0, self.cache.usage() - deficit)
+            report["bytes_reclaimed"] += self.cache.evict(target_bytes=target)
+        return report["bytes_reclaimed"]
+
+    def _remove(self, job_id, temp_dir, report):
+        self.job_store.delete(job_id)
+        if temp_dir:
+            report["bytes_reclaimed"] += _remove_path(Path(temp_dir))
+        report["jobs_removed"] += 1
+        self.jobs_removed += 1
+
+    def _run(self):
+        while True:
+            due = []
+            with self._cond:
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    expires_at, job_id = heapq.heappop(self._heap)
+                    deadline = self._deadlines.get(job_id)
+                    # Skip entries superseded by a later schedule() call
+                    if deadline is not None and deadline[0] == expires_at:
+                        due.append((job_id, deadline[1]))
+                        del self._deadlines[job_id]
+
+                next_sweep = self._last_sweep + self.sweep_interval
+                if not due and now < next_sweep:
+                    wake_at = next_sweep
+                    if self._heap:
+                        wake_at = min(wake_at, self._heap[0][0])
+                    self._cond.wait(timeout=max(0.0, wake_at - now))
+                    continue
+
+            try:
+                report = {"jobs_removed": 0, "bytes_reclaimed": 0}
+                for job_id, temp_dir in due:
+                    self._remove(job_id, temp_dir, report)
+                self.bytes_reclaimed += report["bytes_reclaimed"]
+                if time.monotonic() >= self._last_sweep + self.sweep_interval:
+                    self.sweep()
+            except Exception as e:
+                logger.error(f"Janitor error: {str(e)}")
+                self._last_sweep = time.monotonic()
+
+
+def _remove_path(path):
+    """Delete a file or directory tree; returns the bytes freed"""
+    try:
+        if path.is_dir():
+            size = sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            size = path.stat().st_size
+            path.unlink()
+    except FileNotFoundError:
+        return 0
+    return size
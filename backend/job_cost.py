@@ -0,0 +1,74 @@
+"""
+YouTube Audio Downloader Backend Service
+Job cost estimates from video metadata, for admission control and scheduling
+"""
+
+from streaming import pick_audio_format
+
+# Assumed source bitrate when metadata has a duration but no size or bitrate
+DEFAULT_AUDIO_KBPS = 128
+
+
+class JobTooLargeError(Exception):
+    """Raised when a job's estimated size or duration exceeds the limits"""
+
+
+def estimate_cost(info, output):
+    """Estimate a job's media duration and bytes before downloading.
+
+    info is an extracted info dict or the /api/video-info summary; any
+    field may be missing. Returns duration (seconds), source_bytes and
+    output_bytes, each None when it cannot be estimated, and whether the
+    video is a live broadcast.
+    """
+    duration = info.get("duration") or None
+    audio_format = pick_audio_format(info) if info.get("formats") else info
+
+    source_bytes = None
+    if audio_format:
+        source_bytes = audio_format.get("filesize") or audio_format.get(
+            "filesize_approx"
+        )
+        kbps = audio_format.get("abr") or audio_format.get("tbr")
+        if not source_bytes and kbps and duration:
+            source_bytes = kbps * 1000 / 8 * duration
+    if not source_bytes and duration:
+        source_bytes = DEFAULT_AUDIO_KBPS * 1000 / 8 * duration
+
+    output_bytes = source_bytes
+    if output["bitrate"] != "copy" and duration:
+        output_bytes = int(output["bitrate"]) * 1000 / 8 * duration
+
+    return {
+        "duration": duration,
+        "source_bytes": int(source_bytes) if source_bytes else None,
+        "output_bytes": int(output_bytes) if output_bytes else None,
+        "live": bool(info.get("is_live") or info.get("live_status") == "is_live"),
+    }
+
+
+def check_limits(estimate, max_bytes, max_duration):
+    """Raise JobTooLargeError if an estimate is over the configured limits"""
+    if estimate.get("live"):
+        raise JobTooLargeError(
+            "📏 Live broadcasts have no end and cannot be downloaded; "
+            "try again once the broadcast is over."
+        )
+    duration = estimate["duration"]
+    if max_duration and duration and duration > max_duration:
+        raise JobTooLargeError(
+            f"📏 This video is too long to download ({_format_duration(duration)}; "
+            f"the limit is {_format_duration(max_duration)})."
+        )
+    largest = max(estimate["source_bytes"] or 0, estimate["output_bytes"] or 0)
+    if max_bytes and largest > max_bytes:
+        raise JobTooLargeError(
+            f"📏 This audio is too large to download (about {largest // 2**20} MB; "
+            f"the limit is {max_bytes // 2**20} MB)."
+        )
+
+
+def _format_duration(seconds):
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes = remainder // 60
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m"
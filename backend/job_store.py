@@ -0,0 +1,277 @@
+"""
+YouTube Audio Downloader Backend Service
+Job state backends shared by the API endpoints and download workers
+"""
+
+import copy
+import json
+import threading
+import time
+
+from offload import blocking
+from sqlite_util import SQLiteDatabase
+
+
+class JobStore:
+    """Interface for download job state.
+
+    Records are plain JSON-serialisable dicts. Callers always receive
+    copies, so mutating a returned record never changes stored state;
+    use update() for that.
+    """
+
+    def get(self, job_id):
+        """Return a copy of the job record, or None if unknown"""
+        raise NotImplementedError
+
+    def set(self, job_id, data):
+        """Create or replace a job record"""
+        raise NotImplementedError
+
+    def update(self, job_id, **fields):
+        """Merge fields into an existing record; returns False if unknown"""
+        raise NotImplementedError
+
+    def update_if(self, job_id, expected, **fields):
+        """Atomically merge fields only if the record matches expected.
+
+        Returns True if the record existed, every key in expected had
+        the given value, and the update was applied.
+        """
+        raise NotImplementedError
+
+    def delete(self, job_id):
+        """Remove a job record if present"""
+        raise NotImplementedError
+
+    def items(self):
+        """List of (job_id, record) pairs"""
+        raise NotImplementedError
+
+    def claim(self, key, job_id, ttl):
+        """Register job_id as the single in-flight job for key.
+
+        Returns the job ID that owns the key: job_id itself if the claim
+        succeeded, or the existing owner. Claims older than ttl seconds
+        are treated as abandoned and taken over.
+        """
+        raise NotImplementedError
+
+    def release(self, key, job_id):
+        """Drop the claim on key if job_id still owns it"""
+        raise NotImplementedError
+
+    def history(self, job_id):
+        """Journal of status changes for a job, oldest first"""
+        return []
+
+    def __contains__(self, job_id):
+        return self.get(job_id) is not None
+
+    def __len__(self):
+        return len(self.items())
+
+
+class MemoryJobStore(JobStore):
+    """Process-local store; only correct with a single server process"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._flights = {}  # key -> (job_id, claimed_at)
+        self._lock = threading.Lock()
+
+    def get(self, job_id):
+        with self._lock:
+            data = self._jobs.get(job_id)
+            return copy.deepcopy(data) if data is not None else None
+
+    def set(self, job_id, data):
+        with self._lock:
+            self._jobs[job_id] = copy.deepcopy(data)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            if job_id not in self._jobs:
+                return False
+            self._jobs[job_id].update(copy.deepcopy(fields))
+            return True
+
+    def update_if(self, job_id, expected, **fields):
+        with self._lock:
+            data = self._jobs.get(job_id)
+            if data is None or any(data.get(k) != v for k, v in expected.items()):
+                return False
+            data.update(copy.deepcopy(fields))
+            return True
+
+    def delete(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def items(self):
+        with self._lock:
+            return [
+                (job_id, copy.deepcopy(data)) for job_id, data in self._jobs.items()
+            ]
+
+    def claim(self, key, job_id, ttl):
+        now = time.time()
+        with self._lock:
+            owner = self._flights.get(key)
+            if owner is None or now - owner[1] > ttl:
+                self._flights[key] = (job_id, now)
+                return job_id
+            return owner[0]
+
+    def release(self, key, job_id):
+        with self._lock:
+            owner = self._flights.get(key)
+            if owner is not None and owner[0] == job_id:
+                del self._flights[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+
+class SQLiteJobStore(JobStore):
+    """Store backed by a SQLite database in WAL mode.
+
+    Every Gunicorn worker opening the same path sees the same jobs, so
+    progress polls and file fetches can land on any worker. Records
+    survive restarts, and every status change is appended to a journal
+    table alongside the current state. In async mode each call runs on
+    an OS thread (see offload.py), so a busy database never stalls the
+    event loop.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = SQLiteDatabase(path)
+        with self._db.transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS flights ("
+                "key TEXT PRIMARY KEY, job_id TEXT NOT NULL, claimed REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS journal ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, "
+                "at REAL NOT NULL, status TEXT, data TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS journal_job ON journal (job_id, seq)"
+            )
+        # Do not keep the setup connection across a PRELOAD_APP fork()
+        self._db.close()
+
+    @blocking
+    def get(self, job_id):
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @blocking
+    def set(self, job_id, data):
+        with self._db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, data, updated) VALUES (?, ?, ?)",
+                (job_id, json.dumps(data), time.time()),
+            )
+            self._journal(conn, job_id, data)
+
+    def update(self, job_id, **fields):
+        return self.update_if(job_id, {}, **fields)
+
+    @blocking
+    def update_if(self, job_id, expected, **fields):
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            data = json.loads(row[0])
+            if any(data.get(k) != v for k, v in expected.items()):
+                return False
+            previous_status = data.get("status")
+            data.update(fields)
+            conn.execute(
+                "UPDATE jobs SET data = ?, updated = ? WHERE id = ?",
+                (json.dumps(data), time.time(), job_id),
+            )
+            # Only transitions are journaled; updates that leave the status
+            # as it was (progress ticks) just replace the current state
+            if "status" in fields and fields["status"] != previous_status:
+                self._journal(conn, job_id, fields)
+            return True
+
+    @blocking
+    def delete(self, job_id):
+        with self._db.transaction() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            conn.execute("DELETE FROM journal WHERE job_id = ?", (job_id,))
+
+    @blocking
+    def history(self, job_id):
+        with self._db.transaction() as conn:
+            rows = conn.execute(
+                "SELECT at, data FROM journal WHERE job_id = ? ORDER BY seq",
+                (job_id,),
+            ).fetchall()
+        return [dict(json.loads(data), at=at) for at, data in rows]
+
+    @staticmethod
+    def _journal(conn, job_id, fields):
+        conn.execute(
+            "INSERT INTO journal (job_id, at, status, data) VALUES (?, ?, ?, ?)",
+            (job_id, time.time(), fields.get("status"), json.dumps(fields)),
+        )
+
+    @blocking
+    def items(self):
+        with self._db.transaction() as conn:
+            rows = conn.execute("SELECT id, data FROM jobs").fetchall()
+        return [(job_id, json.loads(data)) for job_id, data in rows]
+
+    @blocking
+    def claim(self, key, job_id, ttl):
+        now = time.time()
+        with self._db.transaction() as conn:
+            # BEGIN IMMEDIATE serialises claims across processes
+            row = conn.execute(
+                "SELECT job_id, claimed FROM flights WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] <= ttl:
+                return row[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO flights (key, job_id, claimed) VALUES (?, ?, ?)",
+                (key, job_id, now),
+            )
+            return job_id
+
+    @blocking
+    def release(self, key, job_id):
+        with self._db.transaction() as conn:
+            conn.execute(
+                "DELETE FROM flights WHERE key = ? AND job_id = ?", (key, job_id)
+            )
+
+    @blocking
+    def __len__(self):
+        with self._db.transaction() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+def create_job_store(backend, path=None):
+    """Build the job store selected by Config.JOB_STORE"""
+    if backend == "memory":
+        return MemoryJobStore()
+    if backend == "sqlite":
+        return SQLiteJobStore(path)
+    raise ValueError(f"Unknown job store backend: {backend}")
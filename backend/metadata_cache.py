@@ -0,0 +1,175 @@
+"""
+YouTube Audio Downloader Backend Service
+Bounded TTL/LRU caches for video metadata lookups
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from offload import blocking
+from sqlite_util import SQLiteDatabase
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a per-entry TTL.
+
+    Process-local; only shared by the threads of one process.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl=None):
+        """Store a value, dropping expired entries, then the least recently
+        used ones while over max_entries"""
+        now = time.monotonic()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            # Entries nobody reads again would otherwise stay until evicted
+            for stale in [k for k, entry in self._entries.items() if entry[0] <= now]:
+                del self._entries[stale]
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class SQLiteTTLCache:
+    """TTLCache kept in a SQLite file, shared by every process that opens it.
+
+    With several Gunicorn workers the follow-up request for a video
+    (its download after /api/video-info) usually lands on another
+    worker, which a per-process cache would miss. Values must be
+    JSON-serialisable; get() returns a fresh copy. Several caches share
+    the table, told apart by name. hits and misses count this process
+    only.
+    """
+
+    def __init__(self, path, name, max_entries, ttl):
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._db = SQLiteDatabase(path)
+        with self._db.transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS metadata_cache ("
+                "cache TEXT NOT NULL, key TEXT NOT NULL, expires REAL NOT NULL, "
+                "used REAL NOT NULL, data TEXT NOT NULL, PRIMARY KEY (cache, key))"
+            )
+        # Like SQLiteJobStore, never carry a connection across fork()
+        self._db.close()
+
+    @blocking
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        now = time.time()
+        conn = self._db.connection()
+        row = conn.execute(
+            "SELECT data FROM metadata_cache WHERE cache = ? AND key = ? "
+            "AND expires > ?",
+            (self.name, key, now),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        # Recency for LRU eviction; a single autocommit statement
+        conn.execute(
+            "UPDATE metadata_cache SET used = ? WHERE cache = ? AND key = ?",
+            (now, self.name, key),
+        )
+        self.hits += 1
+        return json.loads(row[0])
+
+    @blocking
+    def put(self, key, value, ttl=None):
+        """Store a value, dropping expired entries, then the least recently
+        used ones while over max_entries"""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._db.transaction() as conn:
+            conn.execute(
+                "DELETE FROM metadata_cache WHERE cache = ? AND expires <= ?",
+                (self.name, now),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO metadata_cache "
+                "(cache, key, expires, used, data) VALUES (?, ?, ?, ?, ?)",
+                (self.name, key, expires_at, now, json.dumps(value)),
+            )
+            conn.execute(
+                "DELETE FROM metadata_cache WHERE cache = ? AND key IN ("
+                "SELECT key FROM metadata_cache WHERE cache = ? "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.name, self.name, self.max_entries),
+            )
+
+    @blocking
+    def pop(self, key):
+        with self._db.transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM metadata_cache WHERE cache = ? AND key = ?",
+                (self.name, key),
+            ).fetchone()
+            conn.execute(
+                "DELETE FROM metadata_cache WHERE cache = ? AND key = ?",
+                (self.name, key),
+            )
+        return json.loads(row[0]) if row else None
+
+    @blocking
+    def stats(self):
+        entries = self._db.connection().execute(
+            "SELECT COUNT(*) FROM metadata_cache WHERE cache = ?", (self.name,)
+        ).fetchone()[0]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def create_metadata_cache(backend, path, name, max_entries, ttl):
+    """Build a metadata cache stored the same way as the job store backend"""
+    if backend == "memory":
+        return TTLCache(max_entries, ttl)
+    if backend == "sqlite":
+        return SQLiteTTLCache(path, name, max_entries, ttl)
+    raise ValueError(f"Unknown metadata cache backend: {backend}")
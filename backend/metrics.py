@@ -0,0 +1,293 @@
+"""
+YouTube Audio Downloader Backend Service
+Minimal Prometheus text-format metrics (counters, gauges, histograms)
+aggregated across server processes
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans sub-millisecond cache hits up to long downloads
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    body = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + body + "}"
+
+
+def _encode_key(key):
+    """Label key tuple as a JSON object key"""
+    return json.dumps(key)
+
+
+def _decode_key(text):
+    return tuple(tuple(pair) for pair in json.loads(text))
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels.
+
+    Increments accumulate locally until the registry drains them into
+    the shared totals.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # increments not yet flushed
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple((name, labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def drain(self):
+        """Take the pending increments as {encoded key: amount}"""
+        with self._lock:
+            values, self._values = self._values, {}
+        return {_encode_key(key): value for key, value in values.items()}
+
+    @staticmethod
+    def merge(total, pending):
+        for key, value in pending.items():
+            total[key] = total.get(key, 0) + value
+
+    def samples(self, totals):
+        return [(self.name, _decode_key(key), value) for key, value in totals.items()]
+
+
+class Gauge:
+    """Gauge read from a callback.
+
+    The callback returns a number, or a dict of label-value tuple -> number.
+    A per_process gauge describes one server process (its own pools):
+    each process publishes its value when it flushes and the scrape
+    reports the sum over live processes. Other gauges already describe
+    the whole host and are read once at scrape time, so their callbacks
+    must be cheap reads.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self, name, documentation, callback, labelnames=(), per_process=False
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.per_process = per_process
+
+    def values(self):
+        """Current value as {encoded key: number}"""
+        value = self.callback()
+        if not isinstance(value, dict):
+            return {_encode_key(()): value}
+        return {
+            _encode_key(tuple(zip(self.labelnames, label_values))): sample
+            for label_values, sample in value.items()
+        }
+
+    def samples(self, values):
+        return [(self.name, _decode_key(key), value) for key, value in values.items()]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels.
+
+    Like Counter, observations accumulate locally until drained.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((name, labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def drain(self):
+        """Take the pending series as {encoded key: series}"""
+        with self._lock:
+            series, self._series = self._series, {}
+        return {_encode_key(key): values for key, values in series.items()}
+
+    @staticmethod
+    def merge(total, pending):
+        for key, series in pending.items():
+            current = total.get(key)
+            if current is None or len(current) != len(series):
+                total[key] = list(series)
+            else:
+                total[key] = [a + b for a, b in zip(current, series)]
+
+    def samples(self, totals):
+        samples = []
+        for encoded, series in totals.items():
+            key = _decode_key(encoded)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                samples.append(
+                    (f"{self.name}_bucket", key + (("le", _format_value(bound)),), cumulative)
+                )
+            samples.append((f"{self.name}_bucket", key + (("le", "+Inf"),), series[-1]))
+            samples.append((f"{self.name}_sum", key, series[-2]))
+            samples.append((f"{self.name}_count", key, series[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for /api/metrics.
+
+    Every Gunicorn worker has its own registry, so counters and
+    histograms are summed in shared state (see shared_state.py): each
+    process adds what it recorded since its last flush, every
+    flush_interval seconds from a background thread and before it
+    renders a scrape. Totals therefore never go backwards when scrapes
+    land on different workers or a worker is recycled; at most one
+    interval of a dead worker's increments is lost.
+    """
+
+    STATE_NAME = "metrics"
+
+    def __init__(self, state, flush_interval=5.0):
+        self.state = state
+        self.flush_interval = float(flush_interval)
+        self._metrics = []
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, callback, labelnames=(), per_process=False):
+        return self.register(
+            Gauge(name, documentation, callback, labelnames, per_process)
+        )
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def start(self):
+        """Start the background flush thread (idempotent; call after fork)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="metrics-flush", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self):
+        """Add this process's pending values to the shared record.
+
+        Returns a copy of the merged record.
+        """
+        pending = {}
+        gauges = {}
+        for metric in self._metrics:
+            if isinstance(metric, Gauge):
+                if metric.per_process:
+                    gauges[metric.name] = metric.values()
+            else:
+                pending[metric.name] = (metric, metric.drain())
+        pid = str(os.getpid())
+        now = time.time()
+        # Processes that stopped flushing have exited
+        stale_before = now - 3 * self.flush_interval
+
+        def merge(record):
+            for name, (metric, values) in pending.items():
+                metric.merge(record["totals"].setdefault(name, {}), values)
+            processes = record["processes"]
+            processes[pid] = {"at": now, "gauges": gauges}
+            for other, entry in list(processes.items()):
+                if entry["at"] < stale_before:
+                    del processes[other]
+            return json.loads(json.dumps(record))
+
+        return self.state.transact(
+            self.STATE_NAME, lambda: {"totals": {}, "processes": {}}, merge
+        )
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        record = self.flush()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Gauge) and metric.per_process:
+                values = {}
+                for entry in record["processes"].values():
+                    Counter.merge(values, entry["gauges"].get(metric.name, {}))
+            elif isinstance(metric, Gauge):
+                values = metric.values()
+            else:
+                values = record["totals"].get(metric.name, {})
+            for name, labels, value in metric.samples(values):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Metrics flush failed: {str(e)}")
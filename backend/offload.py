@@ -0,0 +1,54 @@
+"""
+YouTube Audio Downloader Backend Service
+Blocking calls handed to OS threads when serving with gevent
+"""
+
+import functools
+import threading
+
+# gevent monkey-patching for SERVER_MODE=async. Sockets, DNS, sleeps and
+# select become cooperative, but threads stay OS threads and subprocess
+# stays the stdlib one: the scheduler pools run yt-dlp and ffmpeg in
+# parallel with the event loop instead of as greenlets stalling it, and
+# gevent's subprocess cannot be used off the main thread anyway.
+PATCH_OPTIONS = {"thread": False, "subprocess": False}
+
+_enabled = False
+
+
+def enable(threadpool_size):
+    """Run blocking calls made on the gevent hub in its threadpool.
+
+    Called by async_wsgi.py once gevent has patched the process.
+    """
+    global _enabled
+    from gevent.hub import Hub
+
+    # Takes effect when the hub creates its threadpool (lazily, per process)
+    Hub.threadpool_size = max(1, int(threadpool_size))
+    _enabled = True
+
+
+def run_blocking(func, *args, **kwargs):
+    """Call func without stalling the gevent event loop.
+
+    In async mode a call from the main thread (where the request
+    greenlets run) is sent to an OS thread of the hub's threadpool and
+    the greenlet waits cooperatively. Otherwise - sync mode, or already
+    on an OS thread such as a scheduler worker - func runs directly.
+    """
+    if not _enabled or threading.current_thread() is not threading.main_thread():
+        return func(*args, **kwargs)
+    from gevent import get_hub
+
+    return get_hub().threadpool.apply(func, args, kwargs)
+
+
+def blocking(method):
+    """Decorator for functions that block (SQLite, CPU-heavy work)"""
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        return run_blocking(method, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,200 @@
+"""
+YouTube Audio Downloader Backend Service
+Parallel byte-range download of a single media URL
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# Statuses a range request is retried on, like a dropped connection
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class RangeNotSupported(Exception):
+    """The server ignored a Range request, did not report the size, or
+    refused the stream (403); the caller downloads it another way"""
+
+
+def get_session(pool_size):
+    """Process-wide keep-alive session, so range requests reuse connections"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _open(session, url, headers, rate_governor, circuit_breaker):
+    """Start a GET under the shared upstream limits.
+
+    Raises CircuitOpenError while the circuit is open, RangeNotSupported
+    on 403 (typically an expired or refused stream URL, which yt-dlp's
+    own downloader handles) and HTTPError on other error statuses.
+    """
+    if circuit_breaker is not None:
+        retry_after = circuit_breaker.retry_after()
+        if retry_after:
+            raise CircuitOpenError(retry_after)
+    if rate_governor is not None:
+        rate_governor.acquire()
+    response = session.get(url, headers=headers, stream=True, timeout=30)
+    if response.status_code in (403, 429) and rate_governor is not None:
+        rate_governor.record_throttle()
+    if response.status_code == 403:
+        response.close()
+        raise RangeNotSupported("status 403")
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    if circuit_breaker is not None:
+        circuit_breaker.record_probe_success()
+    return response
+
+
+def _retryable(error):
+    """Whether a failed request is worth repeating"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in RETRY_STATUSES
+
+
+def _probe_size(session, url, headers, retries, rate_governor, circuit_breaker):
+    """Total size if the server honours byte ranges, else RangeNotSupported"""
+    for attempt in range(retries + 1):
+        try:
+            with _open(
+                session,
+                url,
+                {**headers, "Range": "bytes=0-0"},
+                rate_governor,
+                circuit_breaker,
+            ) as response:
+                content_range = response.headers.get("Content-Range", "")
+                if response.status_code != 206 or "/" not in content_range:
+                    raise RangeNotSupported(f"status {response.status_code}")
+                total = content_range.rsplit("/", 1)[1]
+                if not total.isdigit():
+                    raise RangeNotSupported(f"unknown size: {content_range}")
+                return int(total)
+        except requests.RequestException as e:
+            if attempt == retries or not _retryable(e):
+                raise
+            logger.info(f"Retrying size probe: {str(e)}")
+            time.sleep(min(2**attempt, 10))
+
+
+def fetch_ranged(
+    url,
+    headers,
+    dest_path,
+    chunk_size,
+    connections,
+    retries=3,
+    progress=None,
+    rate_governor=None,
+    max_bytes=None,
+    circuit_breaker=None,
+):
+    """Download url into dest_path with concurrent Range requests.
+
+    The file is preallocated and each range is written at its own
+    offset, so ranges can finish in any order. A range that fails with
+    a connection error, a timeout, 429 or a 5xx is retried with backoff
+    from the last byte it wrote. progress(downloaded, total) is called
+    as data arrives. Every request goes through the rate governor and
+    circuit breaker, if given. Raises RangeNotSupported if the server
+    cannot serve ranges or refuses the URL (403), leaving a partial
+    file, or ValueError if the file is larger than max_bytes. Returns
+    the size in bytes.
+    """
+    session = get_session(connections)
+    total = _probe_size(
+        session, url, headers, retries, rate_governor, circuit_breaker
+    )
+    if max_bytes and total > max_bytes:
+        raise ValueError(
+            f"File is larger than the size limit ({total} > {max_bytes} bytes)"
+        )
+
+    ranges = [
+        (start, min(start + chunk_size, total) - 1)
+        for start in range(0, total, chunk_size)
+    ]
+    downloaded = 0
+    lock = threading.Lock()
+
+    fd = os.open(dest_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # Reserve the space up front so a full disk fails fast
+        if hasattr(os, "posix_fallocate") and total:
+            os.posix_fallocate(fd, 0, total)
+        else:
+            os.ftruncate(fd, total)
+
+        def fetch_range(span):
+            nonlocal downloaded
+            position, end = span
+            for attempt in range(retries + 1):
+                try:
+                    with _open(
+                        session,
+                        url,
+                        {**headers, "Range": f"bytes={position}-{end}"},
+                        rate_governor,
+                        circuit_breaker,
+                    ) as response:
+                        if response.status_code != 206:
+                            raise RangeNotSupported(
+                                f"status {response.status_code} for bytes {position}-{end}"
+                            )
+                        for chunk in response.iter_content(64 * 1024):
+                            os.pwrite(fd, chunk, position)
+                            position += len(chunk)
+                            with lock:
+                                downloaded += len(chunk)
+                                if progress is not None:
+                                    progress(downloaded, total)
+                    if position > end:
+                        return
+                    raise requests.ConnectionError(
+                        f"range ended early at byte {position} of {end}"
+                    )
+                except requests.RequestException as e:
+                    if attempt == retries or not _retryable(e):
+                        raise
+                    logger.info(f"Retrying range from byte {position}: {str(e)}")
+                    time.sleep(min(2**attempt, 10))
+
+        pool = ThreadPoolExecutor(
+            max_workers=max(1, connections), thread_name_prefix="range-fetch"
+        )
+        try:
+            futures = [pool.submit(fetch_range, span) for span in ranges]
+            # Re-raises the first range failure
+            for future in futures:
+                future.result()
+        finally:
+            # After a failure, ranges not yet started are dropped
+            pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        os.close(fd)
+    return total
@@ -0,0 +1,113 @@
+"""
+YouTube Audio Downloader Backend Service
+Adaptive rate governor for upstream (YouTube) requests
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RateGovernor:
+    """Token bucket whose refill rate adapts with AIMD.
+
+    Every upstream request takes a token first. While upstream is
+    healthy the rate climbs linearly (additive increase) up to max_rate;
+    a 403/429 cuts it by backoff_factor (multiplicative decrease). A
+    burst of throttled responses from concurrent jobs counts as a single
+    decrease per cooldown window, since they report the same congestion.
+    The bucket lives in shared state, so all workers draw on one budget.
+    """
+
+    def __init__(
+        self,
+        state,
+        max_rate,
+        min_rate,
+        burst,
+        recovery,
+        backoff_factor,
+        cooldown,
+    ):
+        self.state = state
+        self.max_rate = float(max_rate)
+        # A zero rate would never refill the bucket
+        self.min_rate = max(0.01, min(float(min_rate), self.max_rate))
+        self.burst = max(1.0, float(burst))
+        self.recovery = float(recovery)
+        self.backoff_factor = float(backoff_factor)
+        self.cooldown = float(cooldown)
+
+    def acquire(self):
+        """Wait for a token; returns the seconds spent waiting"""
+
+        def take(bucket):
+            # Reserve the token now, even if that puts the bucket in
+            # debt, so concurrent callers queue up behind each other
+            bucket["tokens"] -= 1
+            if bucket["tokens"] >= 0:
+                return 0.0
+            return -bucket["tokens"] / bucket["rate"]
+
+        wait = self._transact(take)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record_throttle(self):
+        """Report a 403/429 from upstream"""
+
+        def decrease(bucket):
+            bucket["throttle_events"] += 1
+            bucket["last_throttle_at"] = bucket["updated"]
+            if bucket["updated"] - bucket["last_decrease"] < self.cooldown:
+                return None
+            bucket["rate"] = max(self.min_rate, bucket["rate"] * self.backoff_factor)
+            bucket["tokens"] = min(bucket["tokens"], 0.0)
+            bucket["last_decrease"] = bucket["updated"]
+            return bucket["rate"]
+
+        rate = self._transact(decrease)
+        if rate is not None:
+            logger.warning(f"Upstream throttling, backing off to {rate:.2f} requests/s")
+
+    def stats(self):
+        # Read-only: project the refill onto a copy instead of writing it
+        bucket = self._refill(
+            self.state.read("rate_governor", self._initial_bucket), time.time()
+        )
+        return {
+            "rate": round(bucket["rate"], 3),
+            "max_rate": self.max_rate,
+            "min_rate": self.min_rate,
+            "tokens": round(bucket["tokens"], 2),
+            "throttle_events": bucket["throttle_events"],
+            "last_throttle_at": bucket["last_throttle_at"],
+        }
+
+    def _initial_bucket(self):
+        return {
+            "rate": self.max_rate,
+            "tokens": self.burst,
+            "updated": time.time(),
+            "throttle_events": 0,
+            "last_throttle_at": None,
+            "last_decrease": 0.0,
+        }
+
+    def _refill(self, bucket, now):
+        """Bring the bucket's rate and tokens up to now (in place)"""
+        elapsed = max(0.0, now - bucket["updated"])
+        bucket["rate"] = min(self.max_rate, bucket["rate"] + self.recovery * elapsed)
+        bucket["tokens"] = min(self.burst, bucket["tokens"] + bucket["rate"] * elapsed)
+        bucket["updated"] = now
+        return bucket
+
+    def _transact(self, func):
+        """Refill the bucket, then apply func to it atomically"""
+
+        def apply(bucket):
+            return func(self._refill(bucket, time.time()))
+
+        return self.state.transact("rate_governor", self._initial_bucket, apply)
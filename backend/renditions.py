@@ -0,0 +1,74 @@
+"""
+YouTube Audio Downloader Backend Service
+Several output renditions encoded from one ffmpeg decode pass
+"""
+
+import subprocess
+from pathlib import Path
+
+from audio_formats import processing_path, rendition_key
+
+# Output format -> (ffmpeg encoder, file extension) when transcoding
+ENCODERS = {
+    "mp3": ("libmp3lame", "mp3"),
+    "m4a": ("aac", "m4a"),
+    "opus": ("libopus", "opus"),
+}
+
+# Source codec prefix -> file extension when the audio is stream-copied
+COPY_EXTENSIONS = {
+    "mp4a": "m4a",
+    "aac": "m4a",
+    "opus": "opus",
+    "vorbis": "ogg",
+    "mp3": "mp3",
+    "flac": "flac",
+}
+
+
+def output_args(output, source_codec):
+    """(file extension, ffmpeg codec arguments) for one rendition"""
+    source_codec = (source_codec or "").lower()
+    if processing_path(output, source_codec) == "remux":
+        for prefix, extension in COPY_EXTENSIONS.items():
+            if source_codec.startswith(prefix):
+                return extension, ["-c:a", "copy"]
+        # Native output of a codec with no audio-only container: keep it lossless
+        return "flac", ["-c:a", "flac"]
+    encoder, extension = ENCODERS[output["name"]]
+    return extension, ["-c:a", encoder, "-b:a", f"{output['bitrate']}k"]
+
+
+def encode_renditions(source_path, outputs, source_codec, dest_dir, stem):
+    """Produce every output from source_path in a single ffmpeg run.
+
+    ffmpeg decodes the source once and feeds the decoded audio to one
+    encoder per rendition; renditions that can copy the source stream
+    skip encoding entirely. Returns {rendition key: output path} and
+    raises RuntimeError with ffmpeg's message if the run fails.
+    """
+    command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        str(source_path),
+    ]
+    paths = {}
+    for output in outputs:
+        extension, codec_args = output_args(output, source_codec)
+        key = rendition_key(output)
+        path = Path(dest_dir) / f"{stem}.{key}.{extension}"
+        command += ["-map", "0:a:0", *codec_args, str(path)]
+        paths[key] = path
+
+    result = subprocess.run(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        for path in paths.values():
+            path.unlink(missing_ok=True)
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()[-500:]}")
+    return paths
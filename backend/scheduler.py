@@ -0,0 +1,210 @@
+"""
+YouTube Audio Downloader Backend Service
+Bounded download scheduler: fixed worker pool fed by a FIFO or
+shortest-job-first job queue
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler queue cannot accept another job"""
+
+    def __init__(self, retry_after):
+        super().__init__("Download queue is full")
+        self.retry_after = retry_after
+
+
+class DownloadScheduler:
+    """Run download jobs on a fixed number of worker threads.
+
+    Jobs wait in a bounded queue; submitting to a full queue raises
+    QueueFullError carrying a Retry-After estimate in seconds.
+
+    Without aging the queue is FIFO. With aging set, the scheduler runs
+    the waiting job with the lowest cost minus aging x seconds waited
+    (shortest-job-first with aging): short jobs overtake long ones, but
+    a long job's priority keeps rising until it runs. Jobs submitted
+    without a cost count as default_cost.
+
+    With slots (a WorkerSlots), a worker also takes a slot shared with
+    the other server processes before starting a job, so the pool's
+    limit holds across all of them.
+    """
+
+    def __init__(
+        self,
+        workers,
+        max_queued,
+        name="download-worker",
+        aging=None,
+        default_cost=0.0,
+        slots=None,
+    ):
+        self.workers = max(1, int(workers))
+        if slots is not None:
+            # More local threads than global slots would only poll
+            self.workers = min(self.workers, slots.limit)
+        self.max_queued = max(0, int(max_queued))
+        self.name = name
+        self.aging = aging
+        self.default_cost = default_cost
+        self.slots = slots
+        # job_id -> (func, args, cost, enqueued_at), in submission order
+        self._queue = OrderedDict()
+        self._cond = threading.Condition()
+        self._active = 0
+        self._claiming = 0  # workers waiting for a shared slot
+        self._completed = 0
+        self._failed = 0
+        self._busy_seconds = 0.0
+        self._avg_duration = 30.0  # seconds, refined as jobs complete
+        self._threads = []
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker, name=f"{self.name}-{i}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def submit(self, job_id, func, *args, block=False, cost=None):
+        """Queue a job.
+
+        cost is the job's estimated size in any unit consistent across
+        jobs (ignored by a FIFO scheduler). When the queue is at capacity
+        this raises QueueFullError, or with block=True waits for room
+        (backpressure between pipeline stages).
+        """
+        self.start()
+        with self._cond:
+            while len(self._queue) >= self.max_queued + self._ready_workers():
+                if not block:
+                    raise QueueFullError(self._estimate_wait(len(self._queue) + 1))
+                self._cond.wait()
+            if cost is None:
+                cost = self.default_cost
+            self._queue[job_id] = (func, args, cost, time.monotonic())
+            self._cond.notify_all()
+        return self.position(job_id)
+
+    def cancel(self, job_id):
+        """Drop a job that has not started yet"""
+        with self._cond:
+            return self._queue.pop(job_id, None) is not None
+
+    def position(self, job_id):
+        """Queue position of a waiting job, counted past the ready workers.
+
+        0 if a worker that can start it right away is about to take it
+        (or it is not queued), 1 if it runs when the next worker frees
+        up, and so on. With shared slots, a worker is only ready while
+        a slot is free.
+        """
+        # Read before taking the lock; it may touch the shared state
+        free_slots = self.slots.free() if self.slots is not None else self.workers
+        with self._cond:
+            ready = min(self._ready_workers(), free_slots)
+            for index, queued_id in enumerate(self._run_order(), start=1):
+                if queued_id == job_id:
+                    return max(0, index - ready)
+        return 0
+
+    def stats(self):
+        """Snapshot of scheduler state for health and metrics"""
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "active": self._active,
+                "queued": len(self._queue),
+                "max_queued": self.max_queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "busy_seconds": round(self._busy_seconds, 2),
+                "avg_job_seconds": round(self._avg_duration, 2),
+            }
+
+    def _ready_workers(self):
+        """Workers free to take a job now; ones waiting on a shared slot are busy"""
+        return max(0, self.workers - self._active - self._claiming)
+
+    def _priority(self, job_id, now):
+        _func, _args, cost, enqueued_at = self._queue[job_id]
+        return cost - self.aging * (now - enqueued_at)
+
+    def _run_order(self):
+        """Waiting job IDs in the order they would start right now"""
+        if self.aging is None:
+            return list(self._queue)
+        now = time.monotonic()
+        # sorted() is stable, so equal priorities keep submission order
+        return sorted(self._queue, key=lambda job_id: self._priority(job_id, now))
+
+    def _next_job(self):
+        if self.aging is None:
+            return next(iter(self._queue))
+        now = time.monotonic()
+        return min(self._queue, key=lambda job_id: self._priority(job_id, now))
+
+    def _estimate_wait(self, position):
+        """Rough seconds until a job at the given position would start"""
+        rounds = (position + self.workers - 1) // self.workers
+        return max(1, int(rounds * self._avg_duration))
+
+    def _worker(self):
+        while True:
+            if self.slots is not None:
+                # Hold a shared slot before taking a job, so the job stays
+                # queued (and cancellable) while other processes are busy.
+                # Only as many workers as there are waiting jobs compete.
+                with self._cond:
+                    while len(self._queue) <= self._claiming:
+                        self._cond.wait()
+                    self._claiming += 1
+                self.slots.acquire()
+            with self._cond:
+                if self.slots is not None:
+                    self._claiming -= 1
+                    if not self._queue:
+                        # The job was cancelled while we waited
+                        self.slots.release()
+                        continue
+                while not self._queue:
+                    self._cond.wait()
+                job_id = self._next_job()
+                func, args, _cost, _enqueued_at = self._queue.pop(job_id)
+                self._active += 1
+                # Wake producers blocked on a full queue
+                self._cond.notify_all()
+
+            started = time.monotonic()
+            failed = False
+            try:
+                func(*args)
+            except Exception as e:
+                failed = True
+                logger.error(f"Scheduled job {job_id} failed: {str(e)}")
+            finally:
+                if self.slots is not None:
+                    self.slots.release()
+                elapsed = time.monotonic() - started
+                with self._cond:
+                    self._active -= 1
+                    self._busy_seconds += elapsed
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+                    # Exponentially weighted so recent jobs dominate the estimate
+                    self._avg_duration = 0.8 * self._avg_duration + 0.2 * elapsed
+                    self._cond.notify_all()
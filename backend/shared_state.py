@@ -0,0 +1,84 @@
+"""
+YouTube Audio Downloader Backend Service
+Small named state records updated atomically across threads and workers
+"""
+
+import json
+import threading
+
+from offload import blocking
+from sqlite_util import SQLiteDatabase
+
+
+class MemoryState:
+    """Process-local records; only shared by the threads of one process"""
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def transact(self, name, initial, func):
+        """Apply func to the named record atomically and return its result.
+
+        func mutates the record in place; initial() builds it the first
+        time the name is used.
+        """
+        with self._lock:
+            record = self._records.get(name)
+            if record is None:
+                record = self._records[name] = initial()
+            return func(record)
+
+    def read(self, name, initial):
+        """Copy of the named record (initial() if unset), without writing"""
+        with self._lock:
+            record = self._records.get(name)
+            return json.loads(json.dumps(record)) if record is not None else initial()
+
+
+class SQLiteState:
+    """Records in a SQLite file, shared by every process that opens it"""
+
+    def __init__(self, path):
+        self.path = path
+        self._db = SQLiteDatabase(path)
+        with self._db.transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_state ("
+                "name TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+        # Like SQLiteJobStore, never carry a connection across fork()
+        self._db.close()
+
+    @blocking
+    def transact(self, name, initial, func):
+        with self._db.transaction() as conn:
+            # BEGIN IMMEDIATE makes the read-modify-write atomic across processes
+            row = conn.execute(
+                "SELECT data FROM shared_state WHERE name = ?", (name,)
+            ).fetchone()
+            record = json.loads(row[0]) if row else initial()
+            result = func(record)
+            conn.execute(
+                "INSERT OR REPLACE INTO shared_state (name, data) VALUES (?, ?)",
+                (name, json.dumps(record)),
+            )
+            return result
+
+    @blocking
+    def read(self, name, initial):
+        # A plain autocommit SELECT: under WAL it takes no lock and never
+        # waits for (or blocks) writers
+        row = self._db.connection().execute(
+            "SELECT data FROM shared_state WHERE name = ?", (name,)
+        ).fetchone()
+        return json.loads(row[0]) if row else initial()
+
+
+def create_shared_state(backend, path=None):
+    """Build shared state stored the same way as the job store backend"""
+    if backend == "memory":
+        return MemoryState()
+    if backend == "sqlite":
+        return SQLiteState(path)
+    raise ValueError(f"Unknown shared state backend: {backend}")
@@ -0,0 +1,64 @@
+"""
+YouTube Audio Downloader Backend Service
+SQLite connection handling shared by the job store and shared state
+"""
+
+import os
+import sqlite3
+import threading
+
+
+class SQLiteDatabase:
+    """Per-thread connections to one SQLite file in WAL mode.
+
+    sqlite3 connections must not be shared across threads, so each
+    thread opens its own on first use. WAL lets readers run alongside
+    a writer, and every process opening the same path sees the same
+    data.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+
+    def connection(self):
+        """The calling thread's connection, in autocommit mode"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def transaction(self):
+        """Context manager running its block in BEGIN IMMEDIATE ... COMMIT"""
+        return _Transaction(self.connection())
+
+    def close(self):
+        """Close the calling thread's connection, if it has one.
+
+        Stores created before fork() (PRELOAD_APP creates them in the
+        Gunicorn master) call this after setup: SQLite connections must
+        not be carried across fork().
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            del self._local.conn
+
+
+class _Transaction:
+    """Wrap a connection in BEGIN IMMEDIATE ... COMMIT/ROLLBACK"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Worker startup benchmark
+Compares lazy and preloaded (PRELOAD_APP) worker startup: import time,
+time to first yt-dlp use, and memory per worker.
+
+Usage:
+    python startup_benchmark.py --workers 4 --output startup_results.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def memory_stats(pid="self"):
+    """RSS, PSS and private bytes of a process (Linux /proc).
+
+    PSS splits shared pages between the processes sharing them, so it
+    shows what copy-on-write sharing saves; RSS counts them in full.
+    """
+    stats = {}
+    fields = {"Rss": "rss_bytes", "Pss": "pss_bytes"}
+    private = 0
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as rollup:
+            for line in rollup:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    stats[fields[name]] = int(value.split()[0]) * 1024
+                elif name in ("Private_Clean", "Private_Dirty"):
+                    private += int(value.split()[0]) * 1024
+        stats["private_bytes"] = private
+    except FileNotFoundError:
+        import resource
+
+        # ru_maxrss is KiB on Linux
+        stats["rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return stats
+
+
+def lazy_worker():
+    """What a worker pays without preload: import, then yt-dlp on first job"""
+    started = time.perf_counter()
+    import app
+
+    imported = time.perf_counter()
+    app.warm_yt_dlp()
+    ready = time.perf_counter()
+    return {
+        "import_seconds": imported - started,
+        "first_use_seconds": ready - imported,
+        **memory_stats(),
+    }
+
+
+def preload_master(workers):
+    """Import once, then fork workers the way Gunicorn's preload_app does"""
+    started = time.perf_counter()
+    import app
+
+    master_import = time.perf_counter() - started
+    gc.freeze()
+
+    read_fd, write_fd = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            forked = time.perf_counter()
+            app.start_background_services()
+            app.warm_yt_dlp()
+            ready = time.perf_counter()
+            # Measure while the siblings are alive, so shared pages are split
+            time.sleep(1)
+            result = {
+                "import_seconds": 0.0,
+                "first_use_seconds": ready - forked,
+                **memory_stats(),
+            }
+            os.write(write_fd, (json.dumps(result) + "\n").encode())
+            os._exit(0)
+        pids.append(pid)
+
+    os.close(write_fd)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    with os.fdopen(read_fd) as results:
+        worker_results = [json.loads(line) for line in results if line.strip()]
+    return {
+        "master_import_seconds": master_import,
+        "master": memory_stats(),
+        "workers": worker_results,
+    }
+
+
+def run_mode(mode, workers, env):
+    """Run one startup mode in fresh interpreters and collect the results"""
+    if mode == "lazy":
+        env = dict(env, PRELOAD_APP="false")
+        worker_results = []
+        for _ in range(workers):
+            output = subprocess.run(
+                [sys.executable, __file__, "--lazy-worker"],
+                env=env,
+                cwd=BACKEND_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            worker_results.append(json.loads(output.strip().splitlines()[-1]))
+        return {"workers": worker_results}
+
+    env = dict(env, PRELOAD_APP="true")
+    output = subprocess.run(
+        [sys.executable, __file__, "--preload-master", "--workers", str(workers)],
+        env=env,
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def mean(results, key):
+    values = [result[key] for result in results if key in result]
+    return sum(values) / len(values) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker startup benchmark")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", default="startup_results.json")
+    parser.add_argument("--lazy-worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--preload-master", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.lazy_worker:
+        print(json.dumps(lazy_worker()))
+        return
+    if args.preload_master:
+        print(json.dumps(preload_master(args.workers)))
+        return
+
+    print("🔧 Worker Startup Benchmark")
+    print("=" * 50)
+
+    temp_dir = tempfile.mkdtemp(prefix="ytdl_startup_")
+    env = dict(os.environ, TEMP_DIR=temp_dir)
+    for name in ("JOB_STORE_PATH", "CACHE_DIR", "WORK_DIR"):
+        env.pop(name, None)
+
+    results = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    try:
+        for mode in ("lazy", "preload"):
+            print(f"🚀 Starting {args.workers} worker(s) in {mode} mode...")
+            results[mode] = run_mode(mode, args.workers, env)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+
+    print("-" * 30)
+    for mode in ("lazy", "preload"):
+        workers = results[mode]["workers"]
+        print(f"📊 {mode}:")
+        if mode == "preload":
+            print(f"   master import: {results[mode]['master_import_seconds']:.2f}s")
+        print(f"   import per worker: {mean(workers, 'import_seconds'):.2f}s")
+        print(f"   first yt-dlp use: {mean(workers, 'first_use_seconds'):.2f}s")
+        for key in ("rss_bytes", "pss_bytes", "private_bytes"):
+            value = mean(workers, key)
+            if value is not None:
+                print(f"   {key.replace('_bytes', '')} per worker: {value / 2**20:.1f} MiB")
+    print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
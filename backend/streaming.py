@@ -0,0 +1,113 @@
+"""
+YouTube Audio Downloader Backend Service
+Pipe a source audio stream through ffmpeg straight into an HTTP response
+"""
+
+import logging
+import subprocess
+import threading
+
+import requests
+
+from offload import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# codec -> (ffmpeg encoder, ffmpeg muxer, response mimetype, file extension)
+STREAM_FORMATS = {
+    "mp3": ("libmp3lame", "mp3", "audio/mpeg", "mp3"),
+    "aac": ("aac", "adts", "audio/aac", "aac"),
+    "opus": ("libopus", "ogg", "audio/ogg", "ogg"),
+}
+
+
+def pick_audio_format(info):
+    """Choose the best audio-only format from an extracted info dict"""
+    formats = [
+        fmt
+        for fmt in info.get("formats") or []
+        if fmt.get("url") and fmt.get("acodec") not in (None, "none")
+    ]
+    audio_only = [fmt for fmt in formats if fmt.get("vcodec") == "none"]
+    candidates = audio_only or formats
+    if not candidates:
+        return info if info.get("url") else None
+    return max(candidates, key=lambda fmt: fmt.get("abr") or fmt.get("tbr") or 0)
+
+
+def _feed(source_url, headers, stdin, chunk_size, stop):
+    """Copy the source stream into ffmpeg's stdin until done or stopped"""
+    try:
+        with requests.get(
+            source_url, headers=headers, stream=True, timeout=30
+        ) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size):
+                if stop.is_set():
+                    break
+                stdin.write(chunk)
+    except (BrokenPipeError, ValueError):
+        # ffmpeg exited (client went away); nothing left to feed
+        pass
+    except Exception as e:
+        logger.error(f"Stream source error: {str(e)}")
+    finally:
+        try:
+            stdin.close()
+        except Exception:
+            pass
+
+
+def stream_audio(source_url, headers, codec, bitrate, chunk_size=64 * 1024):
+    """Yield encoded audio chunks as ffmpeg produces them.
+
+    The source is fetched on a feeder thread and piped into ffmpeg's
+    stdin; memory per stream is bounded by the pipe buffers and one
+    chunk. Closing the generator (client disconnect) stops the feeder
+    and kills ffmpeg.
+    """
+    encoder, muxer, _, _ = STREAM_FORMATS[codec]
+    process = subprocess.Popen(
+        [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-i",
+            "pipe:0",
+            "-vn",
+            "-c:a",
+            encoder,
+            "-b:a",
+            f"{bitrate}k",
+            "-f",
+            muxer,
+            "pipe:1",
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        bufsize=0,
+    )
+    stop = threading.Event()
+    feeder = threading.Thread(
+        target=_feed,
+        args=(source_url, headers, process.stdin, chunk_size, stop),
+        daemon=True,
+    )
+    feeder.start()
+
+    try:
+        while True:
+            # Pipe reads block; in async mode they run off the event loop
+            chunk = run_blocking(process.stdout.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        stop.set()
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        run_blocking(process.wait)
+        run_blocking(feeder.join, timeout=5)
@@ -0,0 +1,144 @@
+"""
+YouTube Audio Downloader Backend Service
+Persistent on-disk cache of finished audio files
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class TranscodeCache:
+    """Content-addressed audio cache with a byte budget.
+
+    Entries are keyed by video ID, output format and bitrate, and keep
+    the real file extension of the audio they hold. Files are published
+    by renaming a fully written temp file into place, so readers never
+    see partial output. A file's mtime is its publish stamp and never
+    changes afterwards, so HTTP validators can be built from it; the
+    atime is the LRU clock: hits touch it and eviction removes the
+    least recently used entries first.
+
+    The byte total is kept in shared state (one value for every worker
+    process) and refreshed by each eviction pass, which runs after
+    every publish, so usage() is a cheap read rather than a directory
+    scan.
+    """
+
+    TEMP_PREFIX = ".incoming-"
+    STATE_NAME = "transcode_cache"
+
+    def __init__(self, root, max_bytes, state):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.state = state
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(video_id, codec, bitrate):
+        """Cache file name stem for a video rendition"""
+        return f"{video_id}.{codec}-{bitrate}"
+
+    def lookup(self, video_id, codec, bitrate, extensions):
+        """Return the cached file path and refresh its LRU stamp, or None"""
+        key = self.key(video_id, codec, bitrate)
+        for extension in extensions:
+            path = self.root / f"{key}.{extension}"
+            try:
+                # Refresh only the atime; the mtime must stay the publish stamp
+                os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+            except FileNotFoundError:
+                continue
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def publish(self, video_id, codec, bitrate, source):
+        """Move a finished file into the cache atomically; returns its path"""
+        source = Path(source)
+        final_path = self.root / f"{self.key(video_id, codec, bitrate)}{source.suffix}"
+        incoming = self.root / f"{self.TEMP_PREFIX}{uuid.uuid4().hex}"
+        try:
+            # shutil.move copies across filesystems; the rename below is atomic
+            shutil.move(str(source), incoming)
+            # Stamp the publish time (mtime) and first use (atime)
+            os.utime(incoming)
+            os.replace(incoming, final_path)
+        except Exception:
+            incoming.unlink(missing_ok=True)
+            raise
+        self.evict(keep=final_path)
+        return final_path
+
+    def usage(self):
+        """Total bytes held by published entries, as of the last eviction pass"""
+        record = self.state.read(self.STATE_NAME, dict)
+        if "bytes" not in record:
+            # First use of this cache directory: count it once
+            return self._record_usage(sum(size for _, _, size in self._entries()))
+        return record["bytes"]
+
+    def evict(self, keep=None, target_bytes=None):
+        """Delete least recently used entries until under budget.
+
+        Returns the number of bytes reclaimed.
+        """
+        budget = self.max_bytes if target_bytes is None else target_bytes
+        reclaimed = 0
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            total = sum(size for _, _, size in entries)
+            for path, _, size in entries:
+                if total <= budget:
+                    break
+                if keep is not None and path == keep:
+                    continue
+                try:
+                    # Open readers keep their handle; only the name goes away
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                reclaimed += size
+        self._record_usage(total)
+        if reclaimed:
+            logger.info(f"Cache evicted {reclaimed} bytes")
+        return reclaimed
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes": self.usage(),
+            "max_bytes": self.max_bytes,
+        }
+
+    def _record_usage(self, total):
+        def store(record):
+            record["bytes"] = total
+            return total
+
+        return self.state.transact(self.STATE_NAME, dict, store)
+
+    def _entries(self):
+        """(path, last use, size) for every published entry"""
+        entries = []
+        for path in self.root.iterdir():
+            if path.name.startswith(self.TEMP_PREFIX):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_atime, stat.st_size))
+        return entries
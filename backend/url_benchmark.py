@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+YouTube URL parser benchmark
+Times parse_youtube_url against the previous per-call regex approach on a
+mix of valid, equivalent and garbage URLs.
+
+Usage:
+    python url_benchmark.py --iterations 20000
+"""
+
+import argparse
+import timeit
+
+from youtube_url import parse_youtube_url
+
+URLS = [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtu.be/dQw4w9WgXcQ?t=42",
+    "https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ?autoplay=1",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PLrAXtmErZgOeiKm4sgNOknGvNjby9efdf",
+    "https://www.youtube.com/playlist?list=PLrAXtmErZgOeiKm4sgNOknGvNjby9efdf",
+    "https://example.com/watch?v=dQw4w9WgXcQ",
+    "not a url at all",
+    "https://www.youtube.com/watch?v=" + "x" * 500,
+]
+
+
+def legacy_extract_video_id(url):
+    """The parser this replaced: import and uncompiled patterns per call"""
+    import re
+
+    youtube_patterns = [
+        r"(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/|youtube\.com\/v\/|youtube\.com\/shorts\/)([^&\n?#]+)",
+        r"youtube\.com\/watch\?.*v=([^&\n?#]+)",
+        r"m\.youtube\.com\/watch\?.*v=([^&\n?#]+)",
+    ]
+
+    for pattern in youtube_patterns:
+        match = re.search(pattern, url)
+        if match and re.fullmatch(r"[\w-]+", match.group(1)):
+            return match.group(1)
+    return None
+
+
+def time_per_call(func, iterations):
+    """Mean microseconds per URL over the whole corpus"""
+    def run():
+        for url in URLS:
+            func(url)
+
+    seconds = min(timeit.repeat(run, number=iterations, repeat=3))
+    return seconds / (iterations * len(URLS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YouTube URL parser benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print("🔧 YouTube URL Parser Benchmark")
+    print("=" * 50)
+    for url in URLS:
+        video_id, playlist_id = parse_youtube_url(url)
+        status = "✅" if video_id or playlist_id else "❌"
+        print(f"{status} {url[:60]:<60} -> {video_id} {playlist_id}")
+
+    print("-" * 30)
+    new = time_per_call(parse_youtube_url, args.iterations)
+    old = time_per_call(legacy_extract_video_id, args.iterations)
+    print(f"📊 parse_youtube_url:       {new:.2f} µs/URL")
+    print(f"📊 legacy extract_video_id: {old:.2f} µs/URL")
+    print(f"🚀 Speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
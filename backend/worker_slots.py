@@ -0,0 +1,97 @@
+"""
+YouTube Audio Downloader Backend Service
+Concurrency limits shared by every server process
+"""
+
+import os
+import threading
+import time
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _holder_alive(holder):
+    return _alive(int(holder.split(":")[0]))
+
+
+class WorkerSlots:
+    """Counting semaphore kept in shared state.
+
+    Each Gunicorn worker runs its own scheduler pools, so a per-process
+    limit would multiply by the worker count. Pool threads take a slot
+    here before starting a job instead, and at most limit jobs run on
+    the whole host. Slots are recorded under the holder's PID and thread;
+    slots of a process that died (crash, max_requests recycling) are
+    reclaimed by the next caller.
+
+    Callers that are not one thread per holder (streamed responses,
+    which share the event loop thread in async mode) pass their own
+    holder key, made with holder_key().
+
+    Waiters check for a free slot with a lock-free read and only then
+    try the write transaction. Between checks they back off
+    exponentially, and a release in the same process wakes them at once.
+    """
+
+    def __init__(self, state, name, limit, poll_interval=0.05, max_poll_interval=2.0):
+        self.state = state
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._released = threading.Condition()
+
+    @staticmethod
+    def _holder():
+        return f"{os.getpid()}:{threading.get_ident()}"
+
+    @staticmethod
+    def holder_key(tag):
+        """Holder key for this process, unique per tag"""
+        return f"{os.getpid()}:{tag}"
+
+    def _transact(self, func):
+        return self.state.transact(self.name, lambda: {"holders": {}}, func)
+
+    def try_acquire(self, holder=None):
+        """Take a slot if one is free; returns whether it was taken"""
+        holder = holder or self._holder()
+
+        def take(record):
+            holders = record["holders"]
+            for stale in [key for key in holders if not _holder_alive(key)]:
+                del holders[stale]
+            if holder not in holders and len(holders) >= self.limit:
+                return False
+            holders[holder] = time.time()
+            return True
+
+        return self._transact(take)
+
+    def free(self):
+        """Slots free right now, from a read that takes no lock"""
+        holders = self.state.read(self.name, lambda: {"holders": {}})["holders"]
+        return max(0, self.limit - sum(1 for key in holders if _holder_alive(key)))
+
+    def acquire(self):
+        """Wait until a slot is free and take it"""
+        delay = self.poll_interval
+        while not (self.free() and self.try_acquire()):
+            with self._released:
+                self._released.wait(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+
+    def release(self, holder=None):
+        """Give back the calling thread's slot (or holder's)"""
+        holder = holder or self._holder()
+        self._transact(lambda record: record["holders"].pop(holder, None))
+        with self._released:
+            self._released.notify()
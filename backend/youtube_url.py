@@ -0,0 +1,75 @@
+"""
+YouTube Audio Downloader Backend Service
+YouTube URL parsing: canonical video and playlist IDs, checked before any
+yt-dlp work
+"""
+
+import re
+
+# Longer input is never a real YouTube link; refuse it before matching
+MAX_URL_LENGTH = 2048
+
+_URL_RE = re.compile(
+    r"(?:https?://)?(?:(?:www|m|music)\.)?"
+    r"(?P<host>youtube\.com|youtube-nocookie\.com|youtu\.be)"
+    r"(?::\d+)?"
+    r"(?P<path>/[^?#]*)?"
+    r"(?:\?(?P<query>[^#]*))?"
+    r"(?:#.*)?",
+    re.IGNORECASE,
+)
+_PATH_ID_RE = re.compile(r"/(?:shorts|embed|v|e|live)/([^/]+)/?")
+_QUERY_PARAM_RE = re.compile(r"(?:^|&)(v|list)=([^&]*)")
+# IDs become cache file names and job keys, so only the ID alphabet passes
+_VIDEO_ID_RE = re.compile(r"[A-Za-z0-9_-]{11}")
+_PLAYLIST_ID_RE = re.compile(r"[A-Za-z0-9_-]{10,64}")
+
+
+def parse_youtube_url(url):
+    """Return (video_id, playlist_id) for a YouTube URL.
+
+    Accepts watch, youtu.be, /shorts/, /embed/, /v/ and /live/ links on
+    www, m. and music. hosts, with or without a scheme; other query
+    parameters are ignored. Either ID is None when absent, and both are
+    None when the URL is not a YouTube link.
+    """
+    if not isinstance(url, str) or len(url) > MAX_URL_LENGTH:
+        return None, None
+    match = _URL_RE.fullmatch(url.strip())
+    if match is None:
+        return None, None
+
+    path = match.group("path") or "/"
+    video_id = playlist_id = None
+    for name, value in _QUERY_PARAM_RE.findall(match.group("query") or ""):
+        if name == "v" and video_id is None:
+            video_id = value
+        elif name == "list" and playlist_id is None:
+            playlist_id = value
+
+    if match.group("host").lower() == "youtu.be":
+        video_id = path.strip("/")
+    elif path not in ("/watch", "/playlist"):
+        path_match = _PATH_ID_RE.fullmatch(path)
+        video_id = path_match.group(1) if path_match else None
+
+    if video_id is not None and not _VIDEO_ID_RE.fullmatch(video_id):
+        video_id = None
+    if playlist_id is not None and not _PLAYLIST_ID_RE.fullmatch(playlist_id):
+        playlist_id = None
+    return video_id, playlist_id
+
+
+def extract_video_id(url):
+    """Return the YouTube video ID in a URL, or None"""
+    return parse_youtube_url(url)[0]
+
+
+def video_url(video_id):
+    """Canonical watch URL for a video ID"""
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def playlist_url(playlist_id):
+    """Canonical URL for a playlist ID"""
+    return f"https://www.youtube.com/playlist?list={playlist_id}"
@@ -0,0 +1,58 @@
+"""
+YouTube Audio Downloader Backend Service
+Streamed, uncompressed ZIP archives built as their members become ready
+"""
+
+import os
+import time
+import zipfile
+
+
+class _Pipe:
+    """Write-only file object whose contents are drained by the generator.
+
+    It has no tell() or seek(), so zipfile writes in streaming mode
+    (sizes and CRCs go in data descriptors after each member).
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(members, chunk_size=64 * 1024):
+    """Yield a ZIP archive of (arcname, path) members as bytes.
+
+    members may be a generator that blocks until the next file is ready;
+    each file is copied into the archive as soon as it is yielded.
+    Members are stored, not compressed (audio does not compress), so
+    the cost is one read of each file and memory stays at one chunk.
+    """
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, "w", compression=zipfile.ZIP_STORED) as archive:
+        for arcname, path in members:
+            stat = os.stat(path)
+            info = zipfile.ZipInfo(arcname, time.localtime(stat.st_mtime)[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = stat.st_size
+            with open(path, "rb") as source, archive.open(info, "w") as target:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield pipe.drain()
+            yield pipe.drain()
+    # Central directory
+    yield pipe.drain()
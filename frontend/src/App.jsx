@@ -72,8 +72,8 @@ function App() {
         const newDownloadId = downloadResult.download_id
         setDownloadId(newDownloadId)
 
-        // Poll for progress updates
-        await youtubeAPI.pollDownloadProgress(
+        // Follow progress updates (pushed by the server, polling as fallback)
+        await youtubeAPI.watchDownloadProgress(
           newDownloadId,
           (progress) => {
             setDownloadProgress(progress.progress || 0)
@@ -85,7 +85,7 @@ function App() {
               setDownloadProgress(99) // Almost complete
             }
           },
-          1000 // Poll every second
+          1000 // Poll every second if push is unavailable
         )
 
         // Download is complete, trigger file download
@@ -20,6 +20,8 @@ console.log('API Base URL:', API_BASE_URL); // For debugging
 class YouTubeAPIService {
   constructor() {
     this.baseURL = API_BASE_URL;
+    this.progressEventsSupported = null;
+    this.audioStreamsSupported = null;
   }
 
   async makeRequest(endpoint, options = {}) {
@@ -52,10 +54,13 @@ class YouTubeAPIService {
     });
   }
 
-  async startDownload(url) {
+  // options.format: 'mp3' | 'm4a' | 'opus' | 'native'; options.bitrate in kbps.
+  // options.renditions: [{ format, bitrate }, ...] produces several outputs
+  // from one download, each fetched with getDownloadUrl(id, 'mp3-320')
+  async startDownload(url, options = {}) {
     return this.makeRequest('/download', {
       method: 'POST',
-      body: JSON.stringify({ url }),
+      body: JSON.stringify({ url, ...options }),
     });
   }
 
@@ -63,19 +68,62 @@ class YouTubeAPIService {
     return this.makeRequest(`/progress/${downloadId}`);
   }
 
-  getDownloadUrl(downloadId) {
-    return `${this.baseURL}/download/${downloadId}`;
+  // Either a list of video URLs or a single playlist URL
+  async startBatch(urlsOrPlaylist, options = {}) {
+    const source = Array.isArray(urlsOrPlaylist)
+      ? { urls: urlsOrPlaylist }
+      : { url: urlsOrPlaylist };
+    return this.makeRequest('/batch', {
+      method: 'POST',
+      body: JSON.stringify({ ...source, ...options }),
+    });
+  }
+
+  async getBatchProgress(batchId) {
+    return this.makeRequest(`/batch/${batchId}`);
+  }
+
+  // ZIP of the batch. Async servers add files as they finish, so it can be
+  // requested before the batch completes; sync servers answer 409 with
+  // Retry-After until the batch is done
+  getBatchZipUrl(batchId) {
+    return `${this.baseURL}/batch/${batchId}/download`;
+  }
+
+  getDownloadUrl(downloadId, rendition = null) {
+    const query = rendition ? `?rendition=${encodeURIComponent(rendition)}` : '';
+    return `${this.baseURL}/download/${downloadId}${query}`;
+  }
+
+  // Audio is transcoded on the fly; usable directly as a link or <audio> src.
+  // Only async servers serve it (see supportsAudioStreams)
+  getStreamUrl(url, format = 'mp3') {
+    const params = new URLSearchParams({ url, format });
+    return `${this.baseURL}/stream?${params}`;
+  }
+
+  // Link to a video's audio: streamed when the server supports it,
+  // otherwise downloaded as a job first (format 'mp3' | 'aac' | 'opus')
+  async getAudioUrl(url, format = 'mp3', onProgress = () => {}) {
+    if (await this.supportsAudioStreams()) {
+      return this.getStreamUrl(url, format);
+    }
+    const { download_id: downloadId } = await this.startDownload(url, {
+      format: format === 'aac' ? 'm4a' : format,
+    });
+    await this.watchDownloadProgress(downloadId, onProgress);
+    return this.getDownloadUrl(downloadId);
   }
 
   async downloadFile(downloadId) {
     const url = this.getDownloadUrl(downloadId);
     
     try {
-      const response = await fetch(url);
+      // Check availability without transferring the body
+      const response = await fetch(url, { method: 'HEAD' });
       
       if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
+        throw new Error(`HTTP error! status: ${response.status}`);
       }
 
       // Get filename from Content-Disposition header
@@ -83,26 +131,21 @@ class YouTubeAPIService {
       let filename = 'audio.mp3';
       
       if (contentDisposition) {
-        const filenameMatch = contentDisposition.match(/filename="(.+)"/);
+        const filenameMatch = contentDisposition.match(/filename="?([^";]+)"?/);
         if (filenameMatch) {
           filename = filenameMatch[1];
         }
       }
 
-      // Create blob and download
-      const blob = await response.blob();
-      const downloadUrl = window.URL.createObjectURL(blob);
-      
+      // Let the browser download the file itself: it streams to disk and
+      // can resume with Range requests instead of buffering a Blob
       const link = document.createElement('a');
-      link.href = downloadUrl;
+      link.href = url;
       link.download = filename;
       document.body.appendChild(link);
       link.click();
       document.body.removeChild(link);
       
-      // Clean up
-      window.URL.revokeObjectURL(downloadUrl);
-      
       return { success: true, filename };
     } catch (error) {
       console.error('Download failed:', error);
@@ -148,6 +191,70 @@ class YouTubeAPIService {
       poll();
     });
   }
+
+  // Whether the server streams progress events; only async (gevent)
+  // servers do, so this defaults to false. Checked once per page load.
+  async supportsProgressEvents() {
+    if (this.progressEventsSupported === null) {
+      this.progressEventsSupported = this.checkHealth()
+        .then((health) => Boolean(health.features && health.features.progress_events))
+        .catch(() => false);
+    }
+    return this.progressEventsSupported;
+  }
+
+  // Whether the server streams audio (/api/stream); only async (gevent)
+  // servers do, so this defaults to false. Checked once per page load.
+  async supportsAudioStreams() {
+    if (this.audioStreamsSupported === null) {
+      this.audioStreamsSupported = this.checkHealth()
+        .then((health) => Boolean(health.features && health.features.audio_streams))
+        .catch(() => false);
+    }
+    return this.audioStreamsSupported;
+  }
+
+  // Follow download progress over Server-Sent Events when the server
+  // offers them, polling otherwise or if the browser or a proxy in between
+  // does not support them
+  async watchDownloadProgress(downloadId, onProgress, intervalMs = 1000) {
+    if (
+      typeof window.EventSource === 'undefined' ||
+      !(await this.supportsProgressEvents())
+    ) {
+      return this.pollDownloadProgress(downloadId, onProgress, intervalMs);
+    }
+
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${this.baseURL}/progress/${downloadId}/events`);
+      let settled = false;
+
+      const settle = (callback) => {
+        settled = true;
+        source.close();
+        callback();
+      };
+
+      source.onmessage = (event) => {
+        const progress = JSON.parse(event.data);
+        onProgress(progress);
+
+        if (progress.status === 'completed') {
+          settle(() => resolve(progress));
+        } else if (progress.status === 'error') {
+          settle(() => reject(new Error(progress.error || 'Download failed')));
+        }
+      };
+
+      source.onerror = () => {
+        if (settled) return;
+        // Connection failed or dropped mid-download: continue by polling
+        settle(() =>
+          this.pollDownloadProgress(downloadId, onProgress, intervalMs).then(resolve, reject)
+        );
+      };
+    });
+  }
 }
 
 // Create and export a singleton instance
@@ -157,10 +264,14 @@ export const youtubeAPI = new YouTubeAPIService();
 export const {
   getVideoInfo,
   startDownload,
+  startBatch,
+  getBatchProgress,
   getDownloadProgress,
   downloadFile,
+  getAudioUrl,
   checkHealth,
-  pollDownloadProgress
+  pollDownloadProgress,
+  watchDownloadProgress
 } = youtubeAPI;
 
 export default youtubeAPI;